@@ -0,0 +1,129 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+# 沒有期限的請求最多等待的秒數
+MAX_WAIT_SECONDS = 30.0
+
+
+class Ticket:
+    """一個等待預測的畫面"""
+
+    def __init__(self, work, deadline, commit=None):
+        self.work = work            # 實際執行預測的函式，回傳結果 dict
+        self.commit = commit        # 結果準時送回客戶端時才執行 (例如記錄房間已猜過的類別)
+        self.deadline = deadline    # time.monotonic() 的絕對期限，None 表示沒有期限
+        self.done = threading.Event()
+        self.status = 'pending'     # pending / served / late / superseded / expired / error
+        self.result = None
+        self.error = None
+
+
+class AdmissionScheduler:
+    """
+    依期限與房間公平性排程預測請求
+
+    - 每個房間最多只有一個等待中的畫面，新畫面會取代舊畫面 (舊請求回報 superseded)
+    - 開始計算前已超過期限的請求直接丟棄 (回報 expired)
+    - 各房間依序輪流處理，單一繁忙的房間不會讓其他房間餓死
+    - 逾時完成或已被放棄的結果不會執行 commit，客戶端不會採用這些結果
+    """
+
+    def __init__(self, num_workers=1):
+        self._pending = OrderedDict()  # {room_key: Ticket}，順序即輪流的順序
+        self._cond = threading.Condition()
+        self._anonymous = itertools.count()
+        self._counts = {'submitted': 0, 'served': 0, 'late': 0, 'coalesced': 0, 'dropped': 0, 'errors': 0}
+        for i in range(num_workers):
+            threading.Thread(target=self._run, name=f'predict-worker-{i}', daemon=True).start()
+
+    def submit(self, room_id, work, deadline_ms=None, commit=None):
+        """
+        送出一個畫面並等待結果
+
+        Args:
+            room_id: 房間編號；None 表示不與其他請求合併
+            work: 執行預測的函式
+            deadline_ms: 從現在起算的剩餘期限 (毫秒)，由客戶端提供；已逾期的畫面直接回報 expired
+            commit: 以預測結果呼叫的函式，只在狀態為 served 時執行
+
+        Returns:
+            Ticket：status 為 served / late 時 result 為預測結果
+        """
+        now = time.monotonic()
+        deadline = now + deadline_ms / 1000.0 if deadline_ms is not None else None
+        ticket = Ticket(work, deadline, commit)
+        key = room_id if room_id is not None else ('anonymous', next(self._anonymous))
+
+        if deadline is not None and deadline <= now:
+            # 在客戶端排隊或傳輸時就已逾期，不進入佇列，也不取代同房間較新的畫面
+            with self._cond:
+                self._counts['submitted'] += 1
+                self._counts['dropped'] += 1
+            ticket.status = 'expired'
+            return ticket
+
+        with self._cond:
+            self._counts['submitted'] += 1
+            previous = self._pending.get(key)
+            if previous is not None:
+                # 取代舊畫面，但保留房間在輪流順序中的位置
+                previous.status = 'superseded'
+                previous.done.set()
+                self._counts['coalesced'] += 1
+            self._pending[key] = ticket
+            self._cond.notify()
+
+        timeout = (deadline - now if deadline is not None else 0) + MAX_WAIT_SECONDS
+        if not ticket.done.wait(timeout):
+            # 不論是否仍在佇列中都放棄這張票；已開始計算的結果會被 worker 丟棄
+            with self._cond:
+                if self._pending.get(key) is ticket:
+                    del self._pending[key]
+                if ticket.status == 'pending':
+                    ticket.status = 'expired'
+                    self._counts['dropped'] += 1
+        return ticket
+
+    def _next_ticket(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            _, ticket = self._pending.popitem(last=False)
+            return ticket
+
+    def _run(self):
+        while True:
+            ticket = self._next_ticket()
+            if ticket.deadline is not None and time.monotonic() > ticket.deadline:
+                with self._cond:
+                    self._counts['dropped'] += 1
+                ticket.status = 'expired'
+                ticket.done.set()
+                continue
+
+            try:
+                result = ticket.work()
+                late = ticket.deadline is not None and time.monotonic() > ticket.deadline
+                with self._cond:
+                    abandoned = ticket.status != 'pending'
+                    if not abandoned:
+                        ticket.result = result
+                        ticket.status = 'late' if late else 'served'
+                        self._counts['served'] += 1
+                        self._counts['late'] += int(late)
+                if not abandoned and not late and ticket.commit is not None:
+                    ticket.commit(result)
+            except Exception as e:
+                with self._cond:
+                    if ticket.status == 'pending':
+                        ticket.status = 'error'
+                        ticket.error = e
+                    self._counts['errors'] += 1
+            ticket.done.set()
+
+    def stats(self):
+        """送出、完成、逾時完成、被合併與被丟棄的請求數"""
+        with self._cond:
+            return {**self._counts, 'pending_rooms': len(self._pending)}
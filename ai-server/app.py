@@ -1,74 +1,268 @@
 from flask import Flask, request, jsonify
+from werkzeug.serving import WSGIRequestHandler
 import tensorflow as tf
 from PIL import Image # For image processing
 import numpy as np
 import io
 import base64
+import math
+import os
+import time
+
+from admission import AdmissionScheduler
+from candidates import LabelScorer, RoomStore, resolve_candidates
+from cascade import Cascade, cascade_path_for, load_calibration
+from frames import FRAME_MIMETYPE, decode_frame
+from labels import load_label_index, load_wordbank, manifest_path_for
 
 app = Flask(__name__)
 
-# Global variable to hold the model
+MODEL_PATH = os.environ.get('MODEL_PATH', './quickdraw_model.h5')
+# 遊戲題庫：每個題目都必須在模型的標籤空間內
+WORDBANK_PATH = os.environ.get(
+    'WORDBANK_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server', 'data', 'categories-short.txt')
+)
+# 預測工作執行緒數 (TensorFlow 本身已會使用多核心，預設一個即可)
+PREDICT_WORKERS = int(os.environ.get('PREDICT_WORKERS', '1'))
+# 串接推論：設定後先以這個小模型預測，信心不足才交給 MODEL_PATH 的模型
+CASCADE_MODEL_PATH = os.environ.get('CASCADE_MODEL_PATH')
+# 門檻預設讀取小模型旁的 .cascade.json (calibrate_cascade.py 產生)，可用環境變數覆寫
+CASCADE_THRESHOLD = os.environ.get('CASCADE_THRESHOLD')
+# 小模型分給候選類別的機率總和下限 (同樣預設讀取 .cascade.json)
+CASCADE_MIN_MASS = os.environ.get('CASCADE_MIN_MASS')
+
+# Global variables to hold the model and its label index
 model = None
-CLASS_LABELS = ['The Eiffel Tower', 'The Great Wall of China', 'The Mona Lisa', 'aircraft carrier', 'airplane', 'alarm clock', 'ambulance', 'angel', 'animal migration', 'ant', 'anvil', 'apple', 'arm', 'asparagus', 'axe', 'backpack', 'banana', 'bandage', 'barn', 'baseball', 'baseball bat', 'basket', 'basketball', 'bat', 'bathtub', 'beach', 'bear', 'beard', 'bed', 'bee', 'belt', 'bench', 'bicycle', 'binoculars', 'bird', 'birthday cake', 'blackberry', 'blueberry', 'book', 'boomerang', 'bottlecap', 'bowtie', 'bracelet', 'brain', 'bread', 'bridge', 'broccoli', 'broom', 'bucket', 'bulldozer']
-idx_to_class = {0: 'The Eiffel Tower', 1: 'The Great Wall of China', 2: 'The Mona Lisa', 3: 'aircraft carrier', 4: 'airplane', 5: 'alarm clock', 6: 'ambulance', 7: 'angel', 8: 'animal migration', 9: 'ant', 10: 'anvil', 11: 'apple', 12: 'arm', 13: 'asparagus', 14: 'axe', 15: 'backpack', 16: 'banana', 17: 'bandage', 18: 'barn', 19: 'baseball', 20: 'baseball bat', 21: 'basket', 22: 'basketball', 23: 'bat', 24: 'bathtub', 25: 'beach', 26: 'bear', 27: 'beard', 28: 'bed', 29: 'bee', 30: 'belt', 31: 'bench', 32: 'bicycle', 33: 'binoculars', 34: 'bird', 35: 'birthday cake', 36: 'blackberry', 37: 'blueberry', 38: 'book', 39: 'boomerang', 40: 'bottlecap', 41: 'bowtie', 42: 'bracelet', 43: 'brain', 44: 'bread', 45: 'bridge', 46: 'broccoli', 47: 'broom', 48: 'bucket', 49: 'bulldozer'}
-class_to_idx = {'The Eiffel Tower': 0, 'The Great Wall of China': 1, 'The Mona Lisa': 2, 'aircraft carrier': 3, 'airplane': 4, 'alarm clock': 5, 'ambulance': 6, 'angel': 7, 'animal migration': 8, 'ant': 9, 'anvil': 10, 'apple': 11, 'arm': 12, 'asparagus': 13, 'axe': 14, 'backpack': 15, 'banana': 16, 'bandage': 17, 'barn': 18, 'baseball': 19, 'baseball bat': 20, 'basket': 21, 'basketball': 22, 'bat': 23, 'bathtub': 24, 'beach': 25, 'bear': 26, 'beard': 27, 'bed': 28, 'bee': 29, 'belt': 30, 'bench': 31, 'bicycle': 32, 'binoculars': 33, 'bird': 34, 'birthday cake': 35, 'blackberry': 36, 'blueberry': 37, 'book': 38, 'boomerang': 39, 'bottlecap': 40, 'bowtie': 41, 'bracelet': 42, 'brain': 43, 'bread': 44, 'bridge': 45, 'broccoli': 46, 'broom': 47, 'bucket': 48, 'bulldozer': 49}
+label_index = None
+cascade = None
+# 每個房間本回合的候選標籤與已猜過的標籤
+rooms = RoomStore()
+# 每個房間最多一個等待中的畫面，過期的請求不計算，各房間輪流處理
+scheduler = AdmissionScheduler(PREDICT_WORKERS)
 
 # Function to load the model
 def load_model():
-    global model
+    global model, label_index, cascade
     try:
         # Load your Keras model
-        model = tf.keras.models.load_model('./quickdraw_model.h5')
+        model = tf.keras.models.load_model(MODEL_PATH, compile=False) # 推論不需要訓練時的損失函數 (蒸餾模型使用自訂損失)
         print("Model loaded successfully!")
+        # 標籤清單與模型一起載入，不一致就直接停止
+        label_index = load_label_index(MODEL_PATH)
+        label_index.check_model(model)
+        if os.path.exists(WORDBANK_PATH):
+            label_index.check_wordbank(load_wordbank(WORDBANK_PATH))
+        else:
+            print(f"Word bank not found at {WORDBANK_PATH}, skipping word bank check")
+        print(f"Loaded {len(label_index)} class labels from {manifest_path_for(MODEL_PATH)}")
+        stages = [('full', LabelScorer(model), None)]
+        calibration = None
+        if CASCADE_MODEL_PATH:
+            fast_stage, calibration = load_cascade_stage()
+            stages.insert(0, fast_stage)
+        cascade = Cascade(stages, calibration)
     except Exception as e:
         print(f"Error loading model: {e}")
         exit() # Exit if model fails to load
 
+def load_cascade_stage():
+    """載入串接推論的第一階段小模型，標籤必須與主模型完全一致"""
+    fast_model = tf.keras.models.load_model(CASCADE_MODEL_PATH, compile=False)
+    fast_labels = load_label_index(CASCADE_MODEL_PATH)
+    fast_labels.check_model(fast_model)
+    if fast_labels.classes != label_index.classes:
+        raise ValueError(f"Cascade model {CASCADE_MODEL_PATH} has a different label manifest than {MODEL_PATH}")
+    calibration = None
+    if os.path.exists(cascade_path_for(CASCADE_MODEL_PATH)):
+        calibration = load_calibration(CASCADE_MODEL_PATH)
+    if CASCADE_THRESHOLD is not None:
+        threshold = float(CASCADE_THRESHOLD)
+    elif calibration is not None:
+        threshold = float(calibration['threshold'])
+    else:
+        raise ValueError(f"No threshold for {CASCADE_MODEL_PATH}: run calibrate_cascade.py or set CASCADE_THRESHOLD")
+    if CASCADE_MIN_MASS is not None:
+        min_mass = float(CASCADE_MIN_MASS)
+    elif calibration is not None:
+        min_mass = float(calibration['min_mass'])
+    else:
+        raise ValueError(f"No min_mass for {CASCADE_MODEL_PATH}: run calibrate_cascade.py or set CASCADE_MIN_MASS")
+    print(f"Cascade enabled: {CASCADE_MODEL_PATH} answers when candidate confidence >= {threshold} "
+          f"and candidate mass >= {min_mass}")
+    return ('fast', LabelScorer(fast_model), (threshold, min_mass)), calibration
+
 # Load the model when the Flask app starts
 with app.app_context():
     load_model()
 
+def preprocess_image(image_data):
+    """將畫布 PNG 轉成模型輸入 (1, 28, 28, 1)"""
+    img = Image.open(io.BytesIO(image_data))
+    img = img.resize((28, 28)) # Resize to your model's expected input size
+    img = img.convert('L')
+    img = img.point(lambda x: 255 - x) # 將圖片反轉顏色
+
+    img_array = np.array(img, dtype=np.float32) / 255.0 # 正規化
+    img_array = np.expand_dims(img_array, axis=0) # 增加 batch 維度 (1)
+    img_array = np.expand_dims(img_array, axis=-1) # 增加 channel 維度 (1)
+    return img_array
+
+def run_prediction(img_array, room_id=None, candidates=None, top_k=0):
+    """
+    在候選類別上預測；指定 room_id 時會排除該房間已猜過的類別
+    (這次的猜測由 record_prediction 在結果準時送回時才記錄)
+
+    Args:
+        top_k: 大於 0 時另外回傳機率最高的 top_k 個類別 (probabilities)，預設不回傳
+
+    Returns:
+        dict: 回傳給客戶端的結果
+    """
+    indices = candidates
+    if room_id is not None:
+        indices = rooms.active_indices(room_id, len(label_index), candidates)
+    if indices is not None and len(indices) == 0:
+        result = {'success': True, 'predicted_class': None, 'confidence': 0.0}
+        return {**result, 'probabilities': {}} if top_k else result
+
+    probs, stage = cascade.score(img_array, indices)
+    best = int(np.argmax(probs)) # 獲取預測機率最高的類別索引
+    class_idx = best if indices is None else indices[best]
+
+    result = {
+        'success': True,
+        'predicted_class': label_index.classes[class_idx],
+        'confidence': float(probs[best]),
+        'stage': stage,
+    }
+    if top_k:
+        top = np.argsort(-probs)[:top_k]
+        result['probabilities'] = {
+            label_index.classes[i if indices is None else indices[i]]: float(probs[i]) for i in top
+        }
+    return result
+
+def record_prediction(room_id, result):
+    """記錄房間已猜過的類別；只對客戶端會採用的結果呼叫"""
+    if room_id is not None and result['predicted_class'] is not None:
+        rooms.record_guess(room_id, label_index.index_of(result['predicted_class']))
+
+def parse_deadline_ms(data):
+    """
+    讀取客戶端的期限，回傳從現在起算的剩餘毫秒數 (已逾期時為負數)，None 表示沒有期限
+
+    - deadlineAt：絕對期限 (Unix epoch 毫秒)，由 Node 端送出前設定，
+      因此連線池排隊與傳輸的時間也會計入 (兩者在同一台機器上)
+    - deadlineMs：從伺服器收到請求起算的毫秒數
+    """
+    for name in ('deadlineAt', 'deadlineMs'):
+        value = data.get(name)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not (0 < value < math.inf):
+            raise ValueError(f"{name} must be a positive number, got {value!r}")
+        return value - time.time() * 1000.0 if name == 'deadlineAt' else value
+    return None
+
+def parse_top_k(value):
+    """topK 必須是非負整數，預設 0 (不回傳 probabilities)"""
+    if value is None:
+        return 0
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f"topK must be a non-negative integer, got {value!r}")
+    return value
+
+def parse_predict_request():
+    """
+    支援兩種格式：
+    - 二進位畫面 (FRAME_MIMETYPE)：JSON 標頭 + PNG bytes，Node 端的持久連線使用
+    - JSON：{'dataUrl': 'data:image/png;base64,...', ...}
+
+    Returns:
+        (options, image_data)
+    """
+    if request.mimetype == FRAME_MIMETYPE:
+        return decode_frame(request.get_data())
+
+    data = request.get_json()
+    data_url = data['dataUrl']
+    image_data = data_url.split(',')[1] if ',' in data_url else data_url
+    return data, base64.b64decode(image_data)
+
 @app.route('/predict', methods=['POST'])
 def predict():
     # if 'image' not in request.files:
     #     return jsonify({'error': 'No image file provided'}), 400
 
-    data = request.get_json()
+    try:
+        data, image_data = parse_predict_request()
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Invalid request: {str(e)}'}), 400
+    # 回傳請求編號，讓同一條連線上的多個請求可以對應回來
+    request_id = data.get('requestId')
 
-    data_url = data['dataUrl']
-    image_data = data_url.split(',')[1] if ',' in data_url else data_url
-    image_data = base64.b64decode(image_data)
+    # 可選：只在指定的候選標籤或難度設定內預測
+    try:
+        candidates = resolve_candidates(label_index, data.get('candidates'), data.get('difficulty'), data.get('target'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e), 'requestId': request_id}), 400
 
+    room_id = data.get('roomId')
     try:
-        # Read the image and preprocess
-        img = Image.open(io.BytesIO(image_data))
-        print(img)
-        img = img.resize((28, 28)) # Resize to your model's expected input size
-        img = img.convert('L')
-        img = img.point(lambda x: 255 - x) # 將圖片反轉顏色
-
-        img_array = np.array(img, dtype=np.float32) / 255.0 # 正規化
-        img_array = np.expand_dims(img_array, axis=0) # 增加 batch 維度 (1)
-        img_array = np.expand_dims(img_array, axis=-1) # 增加 channel 維度 (1)
-
-        # Process predictions (assuming a classification model)
-        predictions = model.predict(img_array, verbose=0) # verbose=0 避免打印每個預測的進度條
-        predicted_class_index = np.argmax(predictions, axis=1)[0] # 獲取預測機率最高的類別索引
-        predicted_class_name = CLASS_LABELS[predicted_class_index]
-        probabilities = {CLASS_LABELS[i]: float(predictions[0][i]) for i in range(len(CLASS_LABELS))}
-        print(f"Predicted class: {predicted_class_name}, Probabilities: {probabilities}")
-
-        return jsonify({
-            'success': True,
-            'predicted_class': predicted_class_name,
-            'probabilities': probabilities
-        })
+        # 客戶端的期限，超過就不再計算
+        deadline_ms = parse_deadline_ms(data)
+        # 需要時才回傳前幾名的機率，遊戲端的 bot 只用 predicted_class 與 confidence
+        top_k = parse_top_k(data.get('topK'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e), 'requestId': request_id}), 400
+    ticket = scheduler.submit(
+        room_id,
+        lambda: run_prediction(preprocess_image(image_data), room_id, candidates, top_k),
+        deadline_ms,
+        commit=lambda result: record_prediction(room_id, result)
+    )
 
-    except Exception as e:
-        print(f"Prediction error: {e}")
-        return jsonify({'success': False, 'error': f'Prediction failed: {str(e)}'}), 500
+    if ticket.status in ('served', 'late'):
+        result = ticket.result
+        print(f"Predicted class: {result['predicted_class']}, Confidence: {result['confidence']:.4f}")
+        return jsonify({**result, 'status': ticket.status, 'requestId': request_id})
+    if ticket.status == 'error':
+        print(f"Prediction error: {ticket.error}")
+        return jsonify({'success': False, 'error': f'Prediction failed: {str(ticket.error)}', 'requestId': request_id}), 500
+    # superseded: 同房間有更新的畫面；expired: 開始計算前已超過期限
+    return jsonify({'success': False, 'status': ticket.status, 'requestId': request_id})
+
+@app.route('/rooms/<room_id>/round', methods=['POST'])
+def start_round(room_id):
+    # 新回合：設定房間的候選標籤並清空已猜過的列表
+    data = request.get_json(silent=True) or {}
+    try:
+        candidates = resolve_candidates(label_index, data.get('candidates'), data.get('difficulty'), data.get('target'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    rooms.start_round(room_id, candidates)
+    num_candidates = len(label_index) if candidates is None else len(candidates)
+    return jsonify({'success': True, 'num_candidates': num_candidates})
+
+@app.route('/rooms/<room_id>', methods=['DELETE'])
+def remove_room(room_id):
+    rooms.remove(room_id)
+    return jsonify({'success': True})
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    # 串接推論各階段處理的請求比例，以及被合併、丟棄與逾時完成的請求數
+    return jsonify({'cascade': cascade.stats(), 'admission': scheduler.stats()})
+
+@app.route('/labels', methods=['GET'])
+def labels():
+    # 提供模型的標籤空間
+    return jsonify(label_index.to_manifest())
 
 if __name__ == '__main__':
     # For development, run with debug=True
     # For production, use Gunicorn or uWSGI
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # HTTP/1.1 讓 Node 端的 keep-alive 連線池可以重複使用連線
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    app.run(debug=True, port=5000, threaded=True)
\ No newline at end of file
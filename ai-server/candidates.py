@@ -0,0 +1,169 @@
+import random
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import tensorflow as tf
+
+# 難度設定：除了答案之外再加入幾個干擾選項，None 表示使用完整標籤空間
+DIFFICULTY_PROFILES = {
+    'easy': 5,
+    'normal': 15,
+    'hard': None,
+}
+
+# 伺服器端最多保留的房間狀態數量 (最久未使用的會被移除)
+MAX_ROOMS = 1024
+
+
+class LabelScorer:
+    """
+    只對候選標籤計算機率
+
+    若模型最後一層是 softmax Dense，先算出倒數第二層的特徵，
+    再只取候選類別對應的權重欄位計算 logits，不需要產生完整的輸出。
+    其他模型結構則退回完整預測後切片並重新正規化。
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.features = None
+        self.kernel = None
+        self.bias = None
+        final = model.layers[-1]
+        activation = getattr(final, 'activation', None)
+        if isinstance(final, tf.keras.layers.Dense) and getattr(activation, '__name__', '') == 'softmax':
+            self.features = tf.keras.Model(model.inputs, final.input)
+            kernel, bias = final.get_weights()
+            self.kernel = kernel.astype(np.float32)
+            self.bias = bias.astype(np.float32)
+
+    def score(self, img_array, indices=None, with_mass=False):
+        """
+        回傳單張圖片在候選類別 (依 indices 順序) 上的機率分佈
+
+        with_mass=True 時另外回傳模型原本分給候選類別的機率總和 (重新正規化之前)，
+        串接推論用它判斷小模型是否真的認為答案在候選之中。
+        """
+        if self.features is None:
+            probs = self.model(img_array, training=False).numpy()[0]
+            if indices is None:
+                return (probs, 1.0) if with_mass else probs
+            probs = probs[indices]
+            mass = float(probs.sum())
+            probs = probs / max(mass, 1e-12)
+            return (probs, mass) if with_mass else probs
+
+        feats = self.features(img_array, training=False).numpy()[0]
+        if indices is None:
+            logits = feats @ self.kernel + self.bias
+        else:
+            logits = feats @ self.kernel[:, indices] + self.bias[indices]
+        top = logits.max()
+        exp = np.exp(logits - top)
+        total = exp.sum()
+        probs = exp / total
+        if not with_mass:
+            return probs
+        if indices is None:
+            return probs, 1.0
+
+        # 只需要候選以外類別的 logits 來計算正規化常數
+        excluded = np.setdiff1d(np.arange(self.kernel.shape[1]), indices)
+        excluded_logits = feats @ self.kernel[:, excluded] + self.bias[excluded]
+        top_all = max(top, excluded_logits.max()) if len(excluded) else top
+        inside = total * np.exp(top - top_all)
+        outside = np.exp(excluded_logits - top_all).sum()
+        return probs, float(inside / (inside + outside))
+
+
+def resolve_candidates(label_index, candidates=None, difficulty=None, target=None):
+    """
+    將請求中的候選標籤或難度設定轉成類別索引列表
+
+    Returns:
+        list[int] 或 None (None 表示完整標籤空間)
+    """
+    if candidates is not None:
+        indices = []
+        for label in candidates:
+            idx = label_index.index_of(label)
+            if idx is None:
+                raise ValueError(f"Unknown candidate label: {label}")
+            if idx not in indices:
+                indices.append(idx)
+        if not indices:
+            raise ValueError("Candidate list is empty")
+        return indices
+
+    if difficulty is None:
+        return None
+    if difficulty not in DIFFICULTY_PROFILES:
+        raise ValueError(f"Unknown difficulty '{difficulty}'. Available: {list(DIFFICULTY_PROFILES)}")
+    num_distractors = DIFFICULTY_PROFILES[difficulty]
+    if num_distractors is None:
+        return None
+    if target is None:
+        raise ValueError(f"Difficulty '{difficulty}' requires a target label")
+    target_idx = label_index.index_of(target)
+    if target_idx is None:
+        raise ValueError(f"Unknown target label: {target}")
+    others = [i for i in range(len(label_index)) if i != target_idx]
+    distractors = random.sample(others, min(num_distractors, len(others)))
+    return sorted([target_idx, *distractors])
+
+
+class RoomState:
+    def __init__(self, candidates=None):
+        self.candidates = candidates  # None 表示完整標籤空間
+        self.guessed = set()
+
+
+class RoomStore:
+    """每個房間本回合的候選標籤與已猜過的標籤 (執行緒安全，LRU 淘汰)"""
+
+    def __init__(self, max_rooms=MAX_ROOMS):
+        self.max_rooms = max_rooms
+        self._rooms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start_round(self, room_id, candidates=None):
+        with self._lock:
+            self._rooms[room_id] = RoomState(candidates)
+            self._rooms.move_to_end(room_id)
+            self._trim()
+
+    def remove(self, room_id):
+        with self._lock:
+            self._rooms.pop(room_id, None)
+
+    def active_indices(self, room_id, num_classes, candidates=None):
+        """
+        房間本回合可猜的類別索引：請求中的候選 (若有) 或房間的候選，再扣除已猜過的
+
+        Returns:
+            list[int] 或 None (None 表示完整標籤空間且沒有排除任何類別)
+        """
+        with self._lock:
+            state = self._rooms.get(room_id)
+            if state is None:
+                return candidates
+            self._rooms.move_to_end(room_id)
+            if candidates is None:
+                candidates = state.candidates
+            if not state.guessed:
+                return candidates
+            pool = candidates if candidates is not None else range(num_classes)
+            return [i for i in pool if i not in state.guessed]
+
+    def record_guess(self, room_id, index):
+        with self._lock:
+            state = self._rooms.get(room_id)
+            if state is None:
+                state = self._rooms[room_id] = RoomState()
+                self._trim()
+            state.guessed.add(index)
+
+    def _trim(self):
+        while len(self._rooms) > self.max_rooms:
+            self._rooms.popitem(last=False)
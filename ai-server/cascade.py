@@ -0,0 +1,79 @@
+import json
+import os
+import threading
+
+# 串接推論門檻檔：quickdraw_tiny.keras -> quickdraw_tiny.cascade.json (由 calibrate_cascade.py 產生)
+CASCADE_SUFFIX = '.cascade.json'
+
+
+def cascade_path_for(model_path):
+    return os.path.splitext(model_path)[0] + CASCADE_SUFFIX
+
+
+def load_calibration(model_path):
+    """讀取離線校正結果 (門檻、第一階段比例與整體準確率)"""
+    with open(cascade_path_for(model_path), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class Cascade:
+    """
+    信心門檻串接推論
+
+    依序嘗試每個階段：前面的小模型在候選類別上的 top-1 信心達到門檻，
+    且模型分給候選類別的機率總和足夠時直接回答，否則交給下一個階段；
+    最後一個階段 (gate 為 None) 一定會回答。
+
+    第二個條件避免小模型其實偏好已被排除的類別時，
+    以剩下的少量機率重新正規化後的雜訊作答。
+    """
+
+    def __init__(self, stages, calibration=None):
+        """
+        Args:
+            stages: [(name, LabelScorer, gate)]，gate 為 (threshold, min_mass)，最後一個階段的 gate 為 None
+            calibration: 離線校正結果，會一併在 stats() 中回報
+        """
+        if not stages or stages[-1][2] is not None:
+            raise ValueError("The last cascade stage must not have a gate")
+        self.stages = stages
+        self.calibration = calibration
+        self._counts = {name: 0 for name, _, _ in stages}
+        self._lock = threading.Lock()
+
+    def score(self, img_array, indices=None):
+        """
+        Returns:
+            (probs, stage_name)：probs 為候選類別 (依 indices 順序) 上的機率分佈
+        """
+        for name, scorer, gate in self.stages:
+            if gate is None:
+                probs = scorer.score(img_array, indices)
+                break
+            threshold, min_mass = gate
+            probs, mass = scorer.score(img_array, indices, with_mass=True)
+            if float(probs.max()) >= threshold and mass >= min_mass:
+                break
+        with self._lock:
+            self._counts[name] += 1
+        return probs, name
+
+    def stats(self):
+        """每個階段處理的請求數與比例"""
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        return {
+            'total': total,
+            'calibration': self.calibration,
+            'stages': [
+                {
+                    'name': name,
+                    'threshold': gate[0] if gate else None,
+                    'min_mass': gate[1] if gate else None,
+                    'served': counts[name],
+                    'fraction': counts[name] / total if total else 0.0,
+                }
+                for name, _, gate in self.stages
+            ],
+        }
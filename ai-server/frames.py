@@ -0,0 +1,26 @@
+import json
+import struct
+
+# 二進位畫面格式：[4 bytes 標頭長度 (big-endian)][UTF-8 JSON 標頭][PNG bytes]
+# 取代 base64 data URL 包在 JSON 中的做法，省去約 33% 的傳輸量與伺服器端的 base64 解碼
+FRAME_MIMETYPE = 'application/x-quickdraw-frame'
+_HEADER_LENGTH = struct.Struct('>I')
+
+
+def decode_frame(body):
+    """
+    拆解二進位畫面
+
+    Returns:
+        (header, image_data)：header 為 dict (requestId、roomId、candidates 等)，image_data 為 PNG bytes
+    """
+    if len(body) < _HEADER_LENGTH.size:
+        raise ValueError("Frame is too short")
+    (header_length,) = _HEADER_LENGTH.unpack_from(body)
+    header_end = _HEADER_LENGTH.size + header_length
+    if header_end > len(body):
+        raise ValueError("Frame header length exceeds frame size")
+    header = json.loads(body[_HEADER_LENGTH.size:header_end].decode('utf-8'))
+    if not isinstance(header, dict):
+        raise ValueError("Frame header must be a JSON object")
+    return header, body[header_end:]
@@ -0,0 +1,82 @@
+import json
+import os
+
+# 標籤清單與模型放在一起：quickdraw_model.h5 -> quickdraw_model.labels.json
+# (由 leo_model_package/labels.py 寫出)
+MANIFEST_SUFFIX = '.labels.json'
+
+
+def manifest_path_for(model_path):
+    """回傳模型對應的標籤清單路徑"""
+    return os.path.splitext(model_path)[0] + MANIFEST_SUFFIX
+
+
+def normalize_label(label):
+    """查詢用的正規化：去頭尾空白、轉小寫"""
+    return label.strip().lower()
+
+
+class LabelIndex:
+    """
+    模型輸出空間的類別標籤與預先建好的查詢索引
+
+    - classes: 依模型輸出順序排列的原始標籤
+    - class_to_idx: 原始標籤 -> 索引
+    - normalized_to_idx: 小寫正規化標籤 -> 索引 (查詢用，O(1))
+    """
+
+    def __init__(self, classes):
+        if not classes:
+            raise ValueError("Label manifest contains no classes")
+        self.classes = tuple(classes)
+        self.class_to_idx = {name: i for i, name in enumerate(self.classes)}
+        self.normalized_to_idx = {normalize_label(name): i for i, name in enumerate(self.classes)}
+        if len(self.class_to_idx) != len(self.classes):
+            raise ValueError("Label manifest contains duplicate classes")
+        if len(self.normalized_to_idx) != len(self.classes):
+            raise ValueError("Label manifest contains classes that collide after normalization")
+
+    def __len__(self):
+        return len(self.classes)
+
+    def __contains__(self, label):
+        return normalize_label(label) in self.normalized_to_idx
+
+    def index_of(self, label):
+        """以正規化後的標籤查詢索引，找不到回傳 None"""
+        return self.normalized_to_idx.get(normalize_label(label))
+
+    def check_model(self, model):
+        """模型輸出維度必須與標籤數量一致"""
+        num_outputs = model.output_shape[-1]
+        if num_outputs != len(self.classes):
+            raise ValueError(
+                f"Model has {num_outputs} outputs but label manifest has {len(self.classes)} classes"
+            )
+
+    def check_wordbank(self, words):
+        """遊戲題庫中的每個詞都必須存在於模型的標籤空間"""
+        missing = [word for word in words if word not in self]
+        if missing:
+            raise ValueError(f"Word bank entries not in model label space: {missing}")
+
+    def to_manifest(self):
+        return {'classes': list(self.classes), 'num_classes': len(self.classes)}
+
+
+def load_label_index(model_path):
+    """讀取模型旁的標籤清單"""
+    path = manifest_path_for(model_path)
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    classes = manifest['classes']
+    if manifest.get('num_classes', len(classes)) != len(classes):
+        raise ValueError(f"Label manifest {path} is inconsistent: num_classes != len(classes)")
+    return LabelIndex(classes)
+
+
+def load_wordbank(path):
+    """讀取遊戲題庫 (每行一個詞)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+串接推論門檻校正工具
+功能：
+1. 以 train.py 相同配置切出的驗證集同時評估小模型 (第一階段) 與完整模型 (第二階段)，
+   避免用訓練過的圖片校正而高估第一階段比例與準確率
+2. 模擬遊戲中的排除情境：每張圖分別排除 0 ~ N 個小模型已猜錯的類別，
+   與 ai-server 相同，以候選類別上的 top-1 信心與候選機率總和作為門檻條件
+3. 掃描不同的門檻組合，列出第一階段處理的比例與整體準確率
+4. 選出準確率下降不超過容許值、且第一階段處理比例最高的門檻
+5. 將結果寫到小模型旁的 .cascade.json，ai-server 啟動時讀取
+"""
+
+import os
+import sys
+import json
+import argparse
+import random
+import numpy as np
+import tensorflow as tf
+
+from config import get_config, CONFIGS
+from labels import manifest_path_for, load_label_classes
+from train import load_dataset, split_dataset
+
+# .cascade.json 的檔名規則與 ai-server 共用 (append 讓本目錄的 labels 模組優先)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ai-server'))
+from cascade import cascade_path_for
+
+THRESHOLDS = np.round(np.arange(0.50, 1.00, 0.02), 2)
+MIN_MASSES = (0.3, 0.5, 0.7, 0.9)
+
+
+def load_validation_split(config, classes, samples_per_class):
+    """
+    重現 train.py 的訓練 / 驗證切分，回傳驗證集中每個類別最多 samples_per_class 張
+
+    Returns:
+        (X, y)
+    """
+    images, labels, class_names = load_dataset(config)
+    if class_names != classes:
+        raise ValueError("配置的資料集類別與模型的標籤清單不一致！")
+    _, X_val, _, y_val = split_dataset(images, labels, config)
+    keep = np.concatenate([np.flatnonzero(y_val == c)[:samples_per_class] for c in range(len(classes))])
+    return X_val[keep], y_val[keep]
+
+
+def exclusion_masks(fast_probs, y_true, max_excluded):
+    """
+    產生候選類別遮罩：第 k 個情境排除小模型排名最前面、且不是正確答案的 k 個類別
+    (相當於 bot 已經猜錯 k 次)
+
+    Returns:
+        list[np.ndarray]：每個元素為 (N, C) 的布林遮罩
+    """
+    ranked = np.argsort(-fast_probs, axis=1)
+    masks = []
+    for k in range(max_excluded + 1):
+        mask = np.ones_like(fast_probs, dtype=bool)
+        for i in range(len(y_true)):
+            wrong = ranked[i][ranked[i] != y_true[i]][:k]
+            mask[i, wrong] = False
+        masks.append(mask)
+    return masks
+
+
+def evaluate_thresholds(fast_probs, full_probs, y_true, masks):
+    """
+    計算每組 (門檻, 候選機率下限) 下第一階段處理的比例與整體準確率 (所有排除情境合併計算)
+
+    Returns:
+        (results, fast_accuracy, full_accuracy)：後兩者為候選類別限制下各自單獨使用的準確率
+    """
+    fast_conf, fast_mass, fast_pred, full_pred = [], [], [], []
+    for mask in masks:
+        restricted = np.where(mask, fast_probs, 0.0)
+        mass = restricted.sum(axis=1)
+        fast_mass.append(mass)
+        fast_conf.append(restricted.max(axis=1) / np.maximum(mass, 1e-12))
+        fast_pred.append(restricted.argmax(axis=1))
+        full_pred.append(np.where(mask, full_probs, -1.0).argmax(axis=1))
+    fast_conf = np.concatenate(fast_conf)
+    fast_mass = np.concatenate(fast_mass)
+    fast_pred = np.concatenate(fast_pred)
+    full_pred = np.concatenate(full_pred)
+    y_all = np.tile(y_true, len(masks))
+
+    results = []
+    for min_mass in MIN_MASSES:
+        for threshold in THRESHOLDS:
+            served_fast = (fast_conf >= threshold) & (fast_mass >= min_mass)
+            pred = np.where(served_fast, fast_pred, full_pred)
+            results.append({
+                'threshold': float(threshold),
+                'min_mass': float(min_mass),
+                'stage1_fraction': float(np.mean(served_fast)),
+                'accuracy': float(np.mean(pred == y_all)),
+            })
+    return results, float(np.mean(fast_pred == y_all)), float(np.mean(full_pred == y_all))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='串接推論門檻校正')
+    parser.add_argument('--fast', required=True, help='第一階段小模型路徑')
+    parser.add_argument('--full', required=True, help='第二階段完整模型路徑')
+    parser.add_argument('--config', default='quick_test', choices=list(CONFIGS.keys()),
+                        help='訓練時使用的配置，用來重現同一份驗證集')
+    parser.add_argument('--samples-per-class', type=int, default=200, help='每個類別最多使用的驗證樣本數')
+    parser.add_argument('--max-excluded', type=int, default=3,
+                        help='模擬 bot 已猜錯並被排除的類別數上限')
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01,
+                        help='相對於只用完整模型，可接受的準確率下降')
+    args = parser.parse_args()
+
+    random.seed(42)
+    np.random.seed(42)
+    tf.random.set_seed(42)
+
+    # 兩個模型必須共用同一份標籤清單
+    manifests = []
+    for path in (args.fast, args.full):
+        classes = load_label_classes(path)
+        if classes is None:
+            raise FileNotFoundError(f"找不到 {manifest_path_for(path)}")
+        manifests.append(classes)
+    if manifests[0] != manifests[1]:
+        raise ValueError("兩個模型的標籤清單不一致！")
+
+    X, y = load_validation_split(get_config(args.config), manifests[0], args.samples_per_class)
+    print(f"校正樣本: 驗證集中的 {len(y)} 張")
+    fast_model = tf.keras.models.load_model(args.fast, compile=False)
+    full_model = tf.keras.models.load_model(args.full, compile=False)
+
+    print("\n正在進行預測...")
+    fast_probs = fast_model.predict(X, verbose=0)
+    full_probs = full_model.predict(X, verbose=0)
+    masks = exclusion_masks(fast_probs, y, args.max_excluded)
+    results, fast_accuracy, full_accuracy = evaluate_thresholds(fast_probs, full_probs, y, masks)
+    print("\n" + "=" * 60)
+    print(f"{'門檻':>8s} {'候選機率下限':>12s} {'第一階段比例':>12s} {'整體準確率':>12s}")
+    print("-" * 60)
+    for r in results:
+        print(f"{r['threshold']:8.2f} {r['min_mass']:12.2f} "
+              f"{r['stage1_fraction']:12.2%} {r['accuracy']:12.2%}")
+    print("-" * 60)
+    print(f"排除 0 ~ {args.max_excluded} 個類別的情境下，"
+          f"只用小模型: {fast_accuracy:.2%}，只用完整模型: {full_accuracy:.2%}")
+
+    acceptable = [r for r in results if r['accuracy'] >= full_accuracy - args.max_accuracy_drop]
+    if not acceptable:
+        print(f"\n✗ 沒有門檻能讓準確率維持在 {full_accuracy - args.max_accuracy_drop:.2%} 以上")
+        return
+    best = max(acceptable, key=lambda r: (r['stage1_fraction'], -r['threshold'], -r['min_mass']))
+
+    cascade_path = cascade_path_for(args.fast)
+    with open(cascade_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            **best,
+            'full_model': os.path.basename(args.full),
+            'fast_accuracy': fast_accuracy,
+            'full_accuracy': full_accuracy,
+            'num_samples': int(len(y)),
+            'config': args.config,
+            'max_excluded': args.max_excluded,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 選擇門檻 {best['threshold']:.2f}、候選機率下限 {best['min_mass']:.2f}: "
+          f"第一階段處理 {best['stage1_fraction']:.2%}，整體準確率 {best['accuracy']:.2%}")
+    print(f"已寫入 {cascade_path}")
+
+
+if __name__ == "__main__":
+    main()
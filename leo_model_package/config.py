@@ -5,14 +5,37 @@
 包含不同場景的訓練配置
 """
 
+import os
+
 # 基礎配置
-BASE_CONFIG: dict[str, float | int | str | tuple[int, int]] = {
+BASE_CONFIG: dict[str, float | int | str | bool | tuple[int, int] | None] = {
     'data_dir': 'quickdraw_data',
     'converted_dir': 'converted_image',  # 新增：已轉換圖像的資料夾
+    'packed_dir': 'packed_data',         # convert.py 輸出的打包檔 (每類別一個 .npy)，存在時優先使用
     'image_size': (28, 28),
     'test_size': 0.2,  # 8:2 切分 (訓練:驗證 = 80%:20%)
     'random_state': 42,
-    'model_save_dir': 'saved_models'
+    'model_save_dir': 'saved_models',
+
+    # 模型架構 (見 model.py 的 MODEL_BUILDERS)
+    'architecture': 'advanced_cnn',
+
+    # 知識蒸餾設定：指定 teacher_model 時以該模型的輸出作為軟標籤
+    'teacher_model': None,
+    'distill_temperature': 4.0,        # 軟化 teacher / student 分佈的溫度
+    'distill_alpha': 0.1,              # 硬標籤損失的權重 (其餘為蒸餾損失)
+
+    # 訓練過程設定
+    'reduce_lr_factor': 0.5,           # 驗證損失停滯時學習率的縮小倍率
+    'keep_best_n': 3,                  # 依驗證準確率保留最好的 N 個模型
+    'checkpoint_freq': 'epoch',        # 斷點儲存頻率：'epoch' 或每 N 個 batch
+
+    # 執行環境設定 (None / False 表示使用 TensorFlow 預設值)
+    'intra_op_threads': None,          # 單一運算內部使用的執行緒數
+    'inter_op_threads': None,          # 可同時執行的獨立運算數
+    'xla': False,                      # 使用 XLA JIT 編譯
+    'mixed_precision': False,          # 硬體支援時使用 bfloat16 混合精度
+    'lr_scaling_base_batch': None      # 設定後學習率依 batch_size / base_batch 線性放大
 }
 
 # 快速測試配置 (用於驗證代碼是否正常工作)
@@ -88,6 +111,36 @@ GPU_OPTIMIZED_CONFIG = {
     'reduce_lr_patience': 4
 }
 
+# CPU 優化配置 (多核心 CPU 訓練機)
+CPU_OPTIMIZED_CONFIG = {
+    **BASE_CONFIG,
+    'max_samples_per_category': 2000,
+    'max_categories': 50,
+    'epochs': 30,
+    'batch_size': 512,                 # 大批次提高每核心的運算量
+    'learning_rate': 0.001,
+    'lr_scaling_base_batch': 128,      # 以 batch 128 時的學習率為基準線性放大
+    'early_stopping_patience': 8,
+    'reduce_lr_patience': 4,
+    'intra_op_threads': os.cpu_count(),
+    'inter_op_threads': 2,
+    'xla': True,
+    'mixed_precision': True
+}
+
+# 服務用輕量模型配置 (深度可分離卷積，可搭配 teacher_model 蒸餾)
+SERVING_CONFIG = {
+    **BASE_CONFIG,
+    'architecture': 'separable_cnn',
+    'max_samples_per_category': 3000,
+    'max_categories': 50,
+    'epochs': 40,
+    'batch_size': 256,
+    'learning_rate': 0.002,
+    'early_stopping_patience': 8,
+    'reduce_lr_patience': 4
+}
+
 # 所有可用配置
 CONFIGS = {
     'quick_test': QUICK_TEST_CONFIG,
@@ -95,7 +148,9 @@ CONFIGS = {
     'medium': MEDIUM_TRAINING_CONFIG,
     'full': FULL_TRAINING_CONFIG,
     'all_categories': ALL_CATEGORIES_CONFIG,  # 新增：所有類別訓練配置
-    'gpu_optimized': GPU_OPTIMIZED_CONFIG
+    'gpu_optimized': GPU_OPTIMIZED_CONFIG,
+    'cpu_optimized': CPU_OPTIMIZED_CONFIG,
+    'serving': SERVING_CONFIG
 }
 
 def get_config(config_name):
@@ -126,7 +181,13 @@ def print_all_configs():
         print(f"  Epochs: {config['epochs']}")
         print(f"  Batch Size: {config['batch_size']}")
         print(f"  Learning Rate: {config['learning_rate']}")
-        print(f"  Model: Advanced CNN (only model available)")
+        print(f"  Early Stopping Patience: {config['early_stopping_patience']}, "
+              f"Reduce LR: x{config['reduce_lr_factor']} after {config['reduce_lr_patience']}")
+        print(f"  Threads (intra/inter): {config['intra_op_threads'] or 'default'}/{config['inter_op_threads'] or 'default'}")
+        print(f"  XLA: {config['xla']}, Mixed Precision: {config['mixed_precision']}")
+        print(f"  Model: {config['architecture']}")
+        if config['teacher_model']:
+            print(f"  Teacher: {config['teacher_model']} (T={config['distill_temperature']}, alpha={config['distill_alpha']})")
 
 if __name__ == "__main__":
     print_all_configs()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+QuickDraw 原始資料轉換工具
+功能：
+1. 逐類別串流讀取 ndjson 筆畫檔或 .npy 點陣圖檔，記憶體用量與原始檔大小無關
+2. 以多行程將筆畫光柵化成 image_size 大小的灰階圖 (黑底白線，與 QuickDraw 點陣圖相同)
+3. 直接寫入每類別一個 uint8 的 .npy 打包檔 (N, H, W)，避免產生大量小檔案
+4. 可選擇另外輸出 converted_image/<class>/*.png 以相容舊的腳本
+5. 以類別為單位續傳：已完成的類別會被跳過，中斷的類別會重新轉換
+"""
+
+import os
+import json
+import argparse
+import functools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from config import get_config, CONFIGS
+
+# QuickDraw 官方檔名的前綴
+SOURCE_PREFIXES = ('full_simplified_', 'full_raw_', 'full_numpy_bitmap_')
+CANVAS_SIZE = 256     # 光柵化時的畫布大小，之後再縮放到 image_size
+CANVAS_PADDING = 12
+LINE_WIDTH = 12
+
+
+def find_sources(data_dir):
+    """
+    掃描原始資料夾，回傳 {class_name: source_path}
+
+    同一類別同時有 .npy 與 .ndjson 時優先使用 .npy (已光柵化，轉換較快)
+    """
+    sources = {}
+    for filename in sorted(os.listdir(data_dir)):
+        stem, ext = os.path.splitext(filename)
+        if ext not in ('.ndjson', '.npy'):
+            continue
+        class_name = stem
+        for prefix in SOURCE_PREFIXES:
+            if class_name.startswith(prefix):
+                class_name = class_name[len(prefix):]
+                break
+        if class_name in sources and sources[class_name].endswith('.npy'):
+            continue
+        sources[class_name] = os.path.join(data_dir, filename)
+    return sources
+
+
+def rasterize_strokes(strokes, image_size):
+    """
+    將一筆 QuickDraw 繪圖 ([[xs], [ys], (ts)] 的列表) 畫成灰階圖
+
+    依筆畫的邊界框等比例縮放並置中，因此簡化版與原始版座標都適用
+    """
+    xs = np.concatenate([np.asarray(stroke[0], dtype=np.float32) for stroke in strokes])
+    ys = np.concatenate([np.asarray(stroke[1], dtype=np.float32) for stroke in strokes])
+    min_x, min_y = xs.min(), ys.min()
+    extent = max(xs.max() - min_x, ys.max() - min_y, 1.0)
+    scale = (CANVAS_SIZE - 2 * CANVAS_PADDING) / extent
+    offset_x = (CANVAS_SIZE - (xs.max() - min_x) * scale) / 2
+    offset_y = (CANVAS_SIZE - (ys.max() - min_y) * scale) / 2
+
+    canvas = Image.new('L', (CANVAS_SIZE, CANVAS_SIZE), 0)
+    draw = ImageDraw.Draw(canvas)
+    for stroke in strokes:
+        points = [((x - min_x) * scale + offset_x, (y - min_y) * scale + offset_y)
+                  for x, y in zip(stroke[0], stroke[1])]
+        if len(points) == 1:
+            points = points * 2
+        draw.line(points, fill=255, width=LINE_WIDTH, joint='curve')
+    return np.asarray(canvas.resize(image_size, Image.BOX), dtype=np.uint8)
+
+
+def rasterize_chunk(lines, image_size, recognized_only=True):
+    """
+    在子行程中將一批 ndjson 行轉成 (n, H, W) 陣列
+
+    每行只在這裡解析一次；recognized_only 時略過 recognized=false 的繪圖，
+    因此回傳的筆數可能少於輸入的行數 (全部略過時為 (0, H, W))
+    """
+    drawings = (json.loads(line) for line in lines)
+    images = [rasterize_strokes(drawing['drawing'], image_size) for drawing in drawings
+              if not recognized_only or drawing.get('recognized', True)]
+    if not images:
+        return np.empty((0, image_size[1], image_size[0]), dtype=np.uint8)
+    return np.stack(images)
+
+
+def resize_chunk(bitmaps, image_size):
+    """在子行程中將一批 28x28 點陣圖縮放到 image_size"""
+    return np.stack([np.asarray(Image.fromarray(bitmap.reshape(28, 28)).resize(image_size, Image.BILINEAR),
+                                dtype=np.uint8) for bitmap in bitmaps])
+
+
+def iter_ndjson(path):
+    """逐行讀取 ndjson 的非空白行 (不解析，解析與篩選在子行程中進行)"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def count_lines(path, limit=None):
+    """只計算非空白行數 (最多數到 limit)，不解析 JSON，用來預先配置打包檔大小的上限"""
+    count = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                count += 1
+                if limit and count >= limit:
+                    break
+    return count
+
+
+def iter_chunks(iterable, chunk_size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_bounded(executor, fn, chunks, image_size, max_in_flight):
+    """
+    依序回傳每個 chunk 的結果，同時最多只有 max_in_flight 個 chunk 在處理中
+
+    executor.map 會一次讀完整個輸入，這裡改為邊讀邊送，讓記憶體用量固定；
+    呼叫端提早結束 (close) 時會取消尚未開始的 chunk
+    """
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(fn, chunk, image_size))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def convert_class(class_name, source, packed_dir, image_size, executor, options):
+    """
+    轉換單一類別並寫入 <packed_dir>/<class>.npy
+
+    先寫到 .partial 暫存檔，完成後才改名，因此中斷時不會留下不完整的打包檔
+    """
+    final_path = os.path.join(packed_dir, f'{class_name}.npy')
+    partial_path = final_path + '.partial'
+    height, width = image_size
+    max_samples = options['max_samples']
+    max_in_flight = options['workers'] * 2
+
+    if source.endswith('.npy'):
+        bitmaps = np.load(source, mmap_mode='r')  # (N, 784) uint8，以 mmap 讀取
+        total = len(bitmaps) if not max_samples else min(len(bitmaps), max_samples)
+        packed = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.uint8, shape=(total, height, width))
+        if (height, width) == (28, 28):
+            for start in range(0, total, options['chunk_size']):
+                end = min(start + options['chunk_size'], total)
+                packed[start:end] = bitmaps[start:end].reshape(-1, 28, 28)
+        else:
+            chunks = (np.array(bitmaps[start:min(start + options['chunk_size'], total)])
+                      for start in range(0, total, options['chunk_size']))
+            position = 0
+            for result in run_bounded(executor, resize_chunk, chunks, (width, height), max_in_flight):
+                packed[position:position + len(result)] = result
+                position += len(result)
+    else:
+        # 以行數作為筆數上限預先配置；recognized=false 的繪圖在子行程中才被略過
+        capacity = count_lines(source, max_samples)
+        packed = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.uint8, shape=(capacity, height, width))
+        fn = functools.partial(rasterize_chunk, recognized_only=options['recognized_only'])
+        chunks = iter_chunks(iter_ndjson(source), options['chunk_size'])
+        results = run_bounded(executor, fn, chunks, (width, height), max_in_flight)
+        total = 0
+        for result in results:
+            result = result[:capacity - total]
+            packed[total:total + len(result)] = result
+            total += len(result)
+            if total >= capacity:
+                break
+        results.close()
+
+    allocated = len(packed)
+    packed.flush()
+    del packed
+    if total < allocated:
+        truncate_packed(partial_path, total, options['chunk_size'])
+    os.replace(partial_path, final_path)
+    return total
+
+
+def truncate_packed(path, total, chunk_size):
+    """將預先配置的打包檔縮減為前 total 筆 (分批複製到新檔，記憶體用量固定)"""
+    trimmed_path = path + '.trim'
+    packed = np.load(path, mmap_mode='r')
+    trimmed = np.lib.format.open_memmap(trimmed_path, mode='w+', dtype=np.uint8,
+                                        shape=(total,) + packed.shape[1:])
+    for start in range(0, total, chunk_size):
+        trimmed[start:start + chunk_size] = packed[start:start + chunk_size]
+    trimmed.flush()
+    del packed, trimmed
+    os.replace(trimmed_path, path)
+
+
+def export_png_tree(class_name, packed_dir, converted_dir):
+    """由打包檔輸出 converted_image/<class>/<i>.png (已存在的檔案會跳過)"""
+    packed = np.load(os.path.join(packed_dir, f'{class_name}.npy'), mmap_mode='r')
+    class_dir = os.path.join(converted_dir, class_name)
+    os.makedirs(class_dir, exist_ok=True)
+    for i in range(len(packed)):
+        png_path = os.path.join(class_dir, f'{i}.png')
+        if not os.path.exists(png_path):
+            Image.fromarray(np.array(packed[i])).save(png_path)
+
+
+def convert_all(config, options):
+    """轉換 data_dir 中的所有類別"""
+    data_dir = config['data_dir']
+    packed_dir = config['packed_dir']
+    os.makedirs(packed_dir, exist_ok=True)
+
+    sources = find_sources(data_dir)
+    if not sources:
+        raise ValueError(f"在 {data_dir} 中找不到任何 .ndjson 或 .npy 檔案！")
+    class_names = sorted(sources)
+    if config['max_categories']:
+        class_names = class_names[:config['max_categories']]
+    print(f"找到 {len(class_names)} 個類別，輸出到 '{packed_dir}'")
+
+    with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+        for i, class_name in enumerate(class_names, 1):
+            if os.path.exists(os.path.join(packed_dir, f'{class_name}.npy')):
+                print(f"[{i}/{len(class_names)}] {class_name}: 已完成，跳過")
+            else:
+                total = convert_class(class_name, sources[class_name], packed_dir,
+                                      config['image_size'], executor, options)
+                print(f"[{i}/{len(class_names)}] {class_name}: {total} 張")
+            if options['png']:
+                export_png_tree(class_name, packed_dir, config['converted_dir'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='QuickDraw ndjson / npy 轉換工具')
+    parser.add_argument('--config', default='full', choices=list(CONFIGS.keys()),
+                        help='使用配置中的 data_dir、packed_dir、image_size、max_categories')
+    parser.add_argument('--max-samples', type=int, default=None, help='每個類別最多轉換的筆數')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='光柵化使用的行程數')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='每個工作單位的筆數')
+    parser.add_argument('--all-drawings', action='store_true', help='ndjson 也包含 recognized=false 的繪圖')
+    parser.add_argument('--png', action='store_true', help='另外輸出 converted_image/<class>/*.png')
+    args = parser.parse_args()
+
+    options = {
+        'max_samples': args.max_samples,
+        'workers': args.workers,
+        'chunk_size': args.chunk_size,
+        'recognized_only': not args.all_drawings,
+        'png': args.png,
+    }
+    convert_all(get_config(args.config), options)
+    print("\n✓ 轉換完成！")
+
+
+if __name__ == "__main__":
+    main()
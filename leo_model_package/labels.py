@@ -0,0 +1,44 @@
+"""
+模型標籤清單 (與 ai-server/labels.py 使用相同的格式)
+
+quickdraw_model.keras -> quickdraw_model.labels.json，內容為模型輸出索引對應的類別名稱
+"""
+
+import os
+import sys
+import json
+
+MANIFEST_SUFFIX = '.labels.json'
+
+
+def manifest_path_for(model_path):
+    return os.path.splitext(model_path)[0] + MANIFEST_SUFFIX
+
+
+def write_label_manifest(model_path, classes, **extra):
+    """在模型旁寫出標籤清單，extra 為額外記錄的欄位 (例如資料來源)"""
+    manifest = {'classes': list(classes), 'num_classes': len(classes), **extra}
+    path = manifest_path_for(model_path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_label_classes(model_path):
+    """讀取模型旁的標籤清單，沒有標籤清單時回傳 None"""
+    path = manifest_path_for(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['classes']
+
+
+if __name__ == '__main__':
+    # 為既有模型補上標籤清單：python labels.py <model_path> <converted_image_dir>
+    if len(sys.argv) != 3:
+        print("Usage: python labels.py <model_path> <converted_image_dir>")
+        sys.exit(1)
+    model_path, converted_dir = sys.argv[1], sys.argv[2]
+    # 與訓練腳本相同的類別順序
+    classes = sorted(d for d in os.listdir(converted_dir) if os.path.isdir(os.path.join(converted_dir, d)))
+    print(f"Wrote {write_label_manifest(model_path, classes, source=converted_dir)}")
@@ -1,5 +1,8 @@
 # model.py
 
+import time
+import numpy as np
+import tensorflow as tf
 from tensorflow.keras import layers, models
 from tensorflow.keras.regularizers import l2
 
@@ -61,50 +64,197 @@ def build_advanced_cnn_model(input_shape, num_classes):
         layers.Dense(256, activation='relu', kernel_regularizer=l2(0.001)),
         layers.Dropout(0.5),
         
+        # 輸出層 - 分類 (混合精度訓練時仍以 float32 輸出，確保 softmax 數值穩定)
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
+    ])
+    
+    return model
+
+def build_separable_cnn_model(input_shape, num_classes):
+    """
+    構建一個以 CPU 推論延遲為優先的輕量 CNN 模型
+    
+    特點：
+    - 第一層使用一般卷積，之後改用深度可分離卷積，大幅減少運算量
+    - 以 Global Average Pooling 取代 Flatten + 大型全連接層
+    - 適合 ai-server 的即時預測
+    
+    Args:
+        input_shape: 輸入圖像形狀 (height, width, channels)
+        num_classes: 類別數量
+    
+    Returns:
+        Keras Sequential model
+    """
+    model = models.Sequential([
+        layers.Input(shape=input_shape),
+        
+        # 第一個卷積層塊 - 單通道輸入，深度可分離卷積沒有優勢
+        layers.Conv2D(32, (3, 3), activation='relu', padding='same'),
+        layers.BatchNormalization(),
+        layers.MaxPooling2D((2, 2)),
+        
+        # 第二個卷積層塊 - 深度可分離卷積
+        layers.SeparableConv2D(64, (3, 3), activation='relu', padding='same'),
+        layers.BatchNormalization(),
+        layers.MaxPooling2D((2, 2)),
+        
+        # 第三個卷積層塊 - 深度可分離卷積
+        layers.SeparableConv2D(128, (3, 3), activation='relu', padding='same'),
+        layers.BatchNormalization(),
+        layers.SeparableConv2D(128, (3, 3), activation='relu', padding='same'),
+        layers.BatchNormalization(),
+        layers.MaxPooling2D((2, 2)),
+        
+        # 全域平均池化取代展平 + 全連接層
+        layers.GlobalAveragePooling2D(),
+        layers.Dropout(0.3),
+        
         # 輸出層 - 分類
-        layers.Dense(num_classes, activation='softmax')
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
     ])
     
     return model
 
-def get_model(input_shape, num_classes):
+def build_tiny_cnn_model(input_shape, num_classes):
+    """
+    構建一個極小的 CNN 模型，用於串接推論的第一階段
+    
+    特點：
+    - 只有兩個卷積層與全域平均池化
+    - 延遲極低，負責處理容易辨識的畫面
+    
+    Args:
+        input_shape: 輸入圖像形狀 (height, width, channels)
+        num_classes: 類別數量
+    
+    Returns:
+        Keras Sequential model
+    """
+    model = models.Sequential([
+        layers.Input(shape=input_shape),
+        layers.Conv2D(16, (3, 3), activation='relu', padding='same'),
+        layers.MaxPooling2D((2, 2)),
+        layers.SeparableConv2D(48, (3, 3), activation='relu', padding='same'),
+        layers.MaxPooling2D((2, 2)),
+        layers.GlobalAveragePooling2D(),
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
+    ])
+    
+    return model
+
+# 所有可用的模型架構
+MODEL_BUILDERS = {
+    'advanced_cnn': build_advanced_cnn_model,
+    'separable_cnn': build_separable_cnn_model,
+    'tiny_cnn': build_tiny_cnn_model
+}
+
+def get_model(input_shape, num_classes, architecture='advanced_cnn'):
     """
     獲取模型實例
     
     Args:
         input_shape: 輸入圖像形狀
         num_classes: 類別數量
+        architecture: 模型架構名稱 (見 MODEL_BUILDERS)
     
     Returns:
         Keras model
     """
-    return build_advanced_cnn_model(input_shape, num_classes)
+    if architecture not in MODEL_BUILDERS:
+        raise ValueError(f"Unknown architecture '{architecture}'. Available: {list(MODEL_BUILDERS.keys())}")
+    return MODEL_BUILDERS[architecture](input_shape, num_classes)
+
+def estimate_flops(model):
+    """
+    估算單張圖片前向傳播的浮點運算數 (乘加各算一次)
+    
+    只計算卷積層與全連接層，其餘層的運算量相對很小
+    """
+    flops = 0
+    for layer in model.layers:
+        if isinstance(layer, layers.Dense):
+            flops += 2 * layer.input.shape[-1] * layer.units
+            continue
+        if not isinstance(layer, (layers.Conv2D, layers.SeparableConv2D, layers.DepthwiseConv2D)):
+            continue
+        _, out_h, out_w, out_c = layer.output.shape
+        in_c = layer.input.shape[-1]
+        k_h, k_w = layer.kernel_size
+        if isinstance(layer, layers.SeparableConv2D):
+            # 逐通道卷積 + 1x1 逐點卷積
+            flops += 2 * out_h * out_w * k_h * k_w * in_c * layer.depth_multiplier
+            flops += 2 * out_h * out_w * in_c * layer.depth_multiplier * out_c
+        elif isinstance(layer, layers.DepthwiseConv2D):
+            flops += 2 * out_h * out_w * k_h * k_w * in_c * layer.depth_multiplier
+        else:
+            flops += 2 * out_h * out_w * k_h * k_w * in_c * out_c
+    return int(flops)
+
+def measure_cpu_latency(model, runs=100, warmup=10):
+    """
+    量測單張圖片在 CPU 上的推論延遲 (毫秒，取中位數)
+    """
+    sample = np.zeros((1, *model.input_shape[1:]), dtype=np.float32)
+    timings = []
+    with tf.device('/CPU:0'):
+        for _ in range(warmup):
+            model(sample, training=False)
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(sample, training=False)
+            timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+def profile_model(model):
+    """
+    回傳模型的參數數量、FLOPs 與 CPU 延遲
+    
+    Returns:
+        dict: {'params', 'flops', 'cpu_latency_ms'}
+    """
+    return {
+        'params': int(model.count_params()),
+        'flops': estimate_flops(model),
+        'cpu_latency_ms': measure_cpu_latency(model)
+    }
 
 if __name__ == "__main__":
     # 測試模型構建
-    print("Testing Advanced CNN Model for Quick Draw...")
+    print("Testing Quick Draw Models...")
     
     # 測試參數
     input_shape = (28, 28, 1)  # 28x28 灰度圖像
     num_classes = 50  # 50 個類別
     
-    print(f"Building model for {num_classes} classes...")
-    try:
-        model = get_model(input_shape, num_classes)
-        
-        print("\n=== Model Architecture ===")
-        model.summary()
-        
-        # 計算參數數量
-        total_params = model.count_params()
-        trainable_params = sum([len(w.flatten()) for w in model.trainable_weights])
-        
-        print(f"\n=== Model Statistics ===")
-        print(f"Total parameters: {total_params:,}")
-        print(f"Trainable parameters: {trainable_params:,}")
-        print(f"Model size (estimated): {total_params * 4 / 1024 / 1024:.2f} MB")
-        
-    except Exception as e:
-        print(f"Error building model: {e}")
+    profiles = {}
+    for architecture in MODEL_BUILDERS:
+        print(f"\nBuilding {architecture} model for {num_classes} classes...")
+        try:
+            model = get_model(input_shape, num_classes, architecture)
+            
+            print(f"\n=== {architecture} Architecture ===")
+            model.summary()
+            
+            # 計算參數數量
+            total_params = model.count_params()
+            trainable_params = sum([int(np.prod(w.shape)) for w in model.trainable_weights])
+            profiles[architecture] = profile_model(model)
+            
+            print(f"\n=== {architecture} Statistics ===")
+            print(f"Total parameters: {total_params:,}")
+            print(f"Trainable parameters: {trainable_params:,}")
+            print(f"Model size (estimated): {total_params * 4 / 1024 / 1024:.2f} MB")
+            print(f"FLOPs per image: {profiles[architecture]['flops']:,}")
+            print(f"CPU latency (batch 1): {profiles[architecture]['cpu_latency_ms']:.2f} ms")
+            
+        except Exception as e:
+            print(f"Error building {architecture} model: {e}")
+    
+    print("\n=== Architecture Comparison ===")
+    print(f"{'architecture':16s} {'params':>12s} {'FLOPs':>14s} {'CPU ms':>8s}")
+    for architecture, profile in profiles.items():
+        print(f"{architecture:16s} {profile['params']:12,d} {profile['flops']:14,d} {profile['cpu_latency_ms']:8.2f}")
     
     print("\nModel testing completed!")
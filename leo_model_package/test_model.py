@@ -16,9 +16,12 @@ from PIL import Image
 import tensorflow as tf
 from tensorflow.keras.models import load_model
 
+from labels import manifest_path_for, load_label_classes
+
 class SimpleModelTester:
     def __init__(self):
         self.model = None
+        self.model_path = None
         self.class_names = []  # Will be populated from directory structure
         self.converted_dir = 'converted_image'
         self.saved_models_dir = 'saved_models'
@@ -42,7 +45,8 @@ class SimpleModelTester:
             model_path = self.find_latest_model()
         
         print(f"正在載入模型: {os.path.basename(model_path)}")
-        self.model = load_model(model_path)
+        self.model = load_model(model_path, compile=False)  # 只做推論，蒸餾模型的自訂損失不需載入
+        self.model_path = model_path
         print(f"✓ 模型載入成功！")
         print(f"模型輸入形狀: {self.model.input_shape}")
         print(f"模型輸出形狀: {self.model.output_shape}")
@@ -56,9 +60,14 @@ class SimpleModelTester:
         
         print(f"\n正在載入測試圖片（每類 {samples_per_class} 張）...")
         
-        # 動態獲取所有類別目錄並排序以確保一致的順序
-        available_classes = sorted([d for d in os.listdir(self.converted_dir) 
-                                 if os.path.isdir(os.path.join(self.converted_dir, d))])
+        # 優先使用模型旁的標籤清單，否則動態獲取所有類別目錄並排序以確保一致的順序
+        manifest_classes = load_label_classes(self.model_path) if self.model_path else None
+        if manifest_classes is not None:
+            available_classes = manifest_classes
+            print(f"使用標籤清單: {os.path.basename(manifest_path_for(self.model_path))}")
+        else:
+            available_classes = sorted([d for d in os.listdir(self.converted_dir) 
+                                     if os.path.isdir(os.path.join(self.converted_dir, d))])
         
         if not available_classes:
             raise ValueError(f"在 {self.converted_dir} 中找不到任何類別目錄！")
@@ -69,6 +78,9 @@ class SimpleModelTester:
         
         for class_idx, class_name in enumerate(available_classes):
             class_dir = os.path.join(self.converted_dir, class_name)
+            if not os.path.isdir(class_dir):
+                print(f"⚠️ 警告: 找不到 {class_name} 類別的資料夾")
+                continue
             
             # 獲取該類別的所有圖片
             image_files = glob.glob(os.path.join(class_dir, '*.png'))
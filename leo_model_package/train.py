@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+依配置訓練 Quick Draw 模型
+功能：
+1. 優先從 convert.py 產生的打包檔載入資料，否則讀取 converted_image 的 PNG
+2. 依配置設定執行緒數、XLA 編譯與混合精度
+3. 大批次訓練時依批次大小線性放大學習率
+4. 記錄每個 epoch 的時間與每秒處理圖片數，方便比較不同配置
+5. 依配置提前停止與降低學習率，定期儲存斷點 (含優化器狀態)，中斷後可從最新斷點繼續
+6. 依驗證準確率保留最好的 N 個模型
+7. 可選擇模型架構，並以既有模型作為 teacher 進行知識蒸餾
+"""
+
+import os
+import re
+import glob
+import json
+import time
+import random
+import argparse
+import numpy as np
+from PIL import Image
+
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+
+from config import get_config, CONFIGS
+from model import get_model, profile_model, MODEL_BUILDERS
+from labels import manifest_path_for, write_label_manifest, load_label_classes
+
+BENCHMARK_FILE = 'benchmarks.jsonl'
+
+
+def bf16_supported():
+    """檢查硬體是否支援 bfloat16 運算"""
+    for gpu in tf.config.list_physical_devices('GPU'):
+        details = tf.config.experimental.get_device_details(gpu)
+        if details.get('compute_capability', (0, 0)) >= (8, 0):
+            return True
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+
+def configure_runtime(config):
+    """
+    依配置設定 TensorFlow 執行環境 (必須在任何 TensorFlow 運算之前呼叫)
+
+    Returns:
+        dict: 實際套用的設定
+    """
+    if config['intra_op_threads']:
+        tf.config.threading.set_intra_op_parallelism_threads(config['intra_op_threads'])
+    if config['inter_op_threads']:
+        tf.config.threading.set_inter_op_parallelism_threads(config['inter_op_threads'])
+
+    policy = 'float32'
+    if config['mixed_precision']:
+        if bf16_supported():
+            policy = 'mixed_bfloat16'
+        else:
+            print("⚠️ 硬體不支援 bfloat16，改用 float32")
+    tf.keras.mixed_precision.set_global_policy(policy)
+
+    return {
+        'intra_op_threads': tf.config.threading.get_intra_op_parallelism_threads(),
+        'inter_op_threads': tf.config.threading.get_inter_op_parallelism_threads(),
+        'xla': bool(config['xla']),
+        'precision_policy': policy,
+    }
+
+
+def scaled_learning_rate(config):
+    """大批次訓練時依 batch_size / base_batch 線性放大學習率"""
+    base_batch = config['lr_scaling_base_batch']
+    if not base_batch:
+        return config['learning_rate']
+    return config['learning_rate'] * config['batch_size'] / base_batch
+
+
+def load_packed_dataset(config):
+    """
+    從 packed_dir 的打包檔 (convert.py 產生) 載入圖片，依配置限制類別數與每類樣本數
+
+    Returns:
+        (images, labels, class_names)
+    """
+    packed_dir = config['packed_dir']
+    rng = np.random.default_rng(config['random_state'])
+    class_names = sorted(os.path.splitext(f)[0] for f in os.listdir(packed_dir) if f.endswith('.npy'))
+    if config['max_categories']:
+        class_names = class_names[:config['max_categories']]
+
+    images = []
+    labels = []
+    print(f"正在從 '{packed_dir}' 載入 {len(class_names)} 個類別...")
+    for class_idx, class_name in enumerate(class_names):
+        packed = np.load(os.path.join(packed_dir, f'{class_name}.npy'), mmap_mode='r')
+        if packed.shape[1:] != tuple(config['image_size']):
+            raise ValueError(f"{class_name} 的打包檔大小 {packed.shape[1:]} 與 image_size 不符")
+        max_samples = config['max_samples_per_category']
+        if max_samples and len(packed) > max_samples:
+            # 只讀取抽中的樣本，不載入整個檔案
+            packed = packed[np.sort(rng.choice(len(packed), max_samples, replace=False))]
+        images.append(np.asarray(packed))
+        labels.append(np.full(len(packed), class_idx, dtype=np.int32))
+        print(f"✓ {class_name}: {len(packed)} 張")
+
+    images = np.expand_dims(np.concatenate(images).astype(np.float32) / 255.0, axis=-1)
+    return images, np.concatenate(labels), class_names
+
+
+def has_packed_dataset(config):
+    packed_dir = config['packed_dir']
+    return os.path.isdir(packed_dir) and any(f.endswith('.npy') for f in os.listdir(packed_dir))
+
+
+def load_dataset(config):
+    """
+    從 converted_dir 載入圖片，依配置限制類別數與每類樣本數
+
+    Returns:
+        (images, labels, class_names)
+    """
+    if has_packed_dataset(config):
+        return load_packed_dataset(config)
+
+    converted_dir = config['converted_dir']
+    height, width = config['image_size']
+    rng = random.Random(config['random_state'])
+
+    class_names = sorted([d for d in os.listdir(converted_dir)
+                          if os.path.isdir(os.path.join(converted_dir, d))])
+    if config['max_categories']:
+        class_names = class_names[:config['max_categories']]
+    if not class_names:
+        raise ValueError(f"在 {converted_dir} 中找不到任何類別目錄！")
+
+    images = []
+    labels = []
+    print(f"正在從 '{converted_dir}' 載入 {len(class_names)} 個類別...")
+    for class_idx, class_name in enumerate(class_names):
+        class_dir = os.path.join(converted_dir, class_name)
+        image_files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith('.png'))
+        max_samples = config['max_samples_per_category']
+        if max_samples and len(image_files) > max_samples:
+            image_files = rng.sample(image_files, max_samples)
+
+        for img_file in image_files:
+            try:
+                img = Image.open(os.path.join(class_dir, img_file)).convert('L')
+                if img.size != (width, height):
+                    img = img.resize((width, height))
+                images.append(np.array(img, dtype=np.uint8))
+                labels.append(class_idx)
+            except Exception as e:
+                print(f"⚠️ 無法載入圖片 {img_file}: {e}")
+        print(f"✓ {class_name}: {len(image_files)} 張")
+
+    images = np.expand_dims(np.array(images, dtype=np.float32) / 255.0, axis=-1)
+    labels = np.array(labels, dtype=np.int32)
+    return images, labels, class_names
+
+
+def split_dataset(images, labels, config):
+    """
+    依配置切出訓練集與驗證集 (固定 random_state，其他工具可重現同一份驗證集)
+
+    Returns:
+        (X_train, X_val, y_train, y_val)
+    """
+    return train_test_split(
+        images, labels,
+        test_size=config['test_size'],
+        random_state=config['random_state'],
+        stratify=labels
+    )
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """記錄每個 epoch 訓練步驟的時間 (不含驗證) 與每秒處理的圖片數"""
+
+    def __init__(self, num_samples):
+        super().__init__()
+        self.num_samples = num_samples
+        self.epoch_times = []
+        self.images_per_sec = []
+        self._epoch_start = None
+        self._train_elapsed = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+        self._train_elapsed = None
+
+    def on_test_begin(self, logs=None):
+        # 驗證在 epoch 的訓練步驟之後執行，計時到這裡為止
+        if self._epoch_start is not None and self._train_elapsed is None:
+            self._train_elapsed = time.perf_counter() - self._epoch_start
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = self._train_elapsed
+        if elapsed is None:
+            elapsed = time.perf_counter() - self._epoch_start
+        self.epoch_times.append(elapsed)
+        self.images_per_sec.append(self.num_samples / elapsed)
+        print(f"  epoch {epoch + 1}: {elapsed:.1f}s, {self.images_per_sec[-1]:.0f} images/sec")
+
+    def steady_images_per_sec(self):
+        """排除第一個 epoch (包含 XLA 編譯與暖機) 後的平均吞吐量"""
+        samples = self.images_per_sec[1:] or self.images_per_sec
+        return float(np.mean(samples)) if samples else 0.0
+
+
+class BestModelsKeeper(tf.keras.callbacks.Callback):
+    """
+    依驗證準確率保留最好的 N 個模型 (含標籤清單)
+
+    從斷點繼續訓練時 (resume=True)，會先掃描 best_dir 中既有的模型，延續之前的排名；
+    新的訓練一律使用新的 run 資料夾，不會混入其他次訓練的模型。
+    """
+
+    FILE_PATTERN = re.compile(r'epoch(\d+)_valacc(\d+\.\d+)\.keras$')
+
+    def __init__(self, best_dir, keep_n, architecture, class_names, source, resume=False):
+        super().__init__()
+        self.best_dir = best_dir
+        self.keep_n = keep_n
+        self.architecture = architecture
+        self.class_names = class_names
+        self.source = source
+        os.makedirs(best_dir, exist_ok=True)
+        self.best = []  # [(val_accuracy, path)]，由高到低
+        for path in glob.glob(os.path.join(best_dir, '*.keras')) if resume else []:
+            match = self.FILE_PATTERN.search(os.path.basename(path))
+            if match:
+                self.best.append((float(match.group(2)), path))
+        self.best.sort(reverse=True)
+
+    def on_epoch_end(self, epoch, logs=None):
+        val_accuracy = (logs or {}).get('val_accuracy')
+        if val_accuracy is None or self.keep_n <= 0:
+            return
+        if len(self.best) >= self.keep_n and val_accuracy <= self.best[-1][0]:
+            return
+
+        path = os.path.join(self.best_dir, f'epoch{epoch + 1:03d}_valacc{val_accuracy:.4f}.keras')
+        save_model(self.model, path, self.architecture, self.class_names, self.source)
+        self.best.append((val_accuracy, path))
+        self.best.sort(reverse=True)
+
+        while len(self.best) > self.keep_n:
+            _, evicted = self.best.pop()
+            for stale in (evicted, manifest_path_for(evicted)):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        print(f"  ✓ 保留最佳模型: {os.path.basename(path)}")
+
+
+class CallbackStateStore(tf.keras.callbacks.Callback):
+    """
+    保存提前停止與降低學習率的進度 (best、wait 等)，斷點接續時還原
+
+    BackupAndRestore 只還原模型與優化器；沒有這個 callback 時，每次中斷後 patience 都會重新計算。
+    必須放在被保存的 callbacks 之後，on_train_begin 才會在它們重設狀態之後執行。
+    """
+
+    FIELDS = ('best', 'wait', 'best_epoch', 'cooldown_counter')
+
+    def __init__(self, path, callbacks, resume=False):
+        super().__init__()
+        self.path = path
+        self.callbacks = callbacks
+        self.resume = resume
+
+    def on_train_begin(self, logs=None):
+        if not self.resume or not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            states = json.load(f)
+        for callback in self.callbacks:
+            for field, value in states.get(type(callback).__name__, {}).items():
+                setattr(callback, field, value)
+        print(f"已還原 callbacks 狀態: {states}")
+
+    def on_epoch_end(self, epoch, logs=None):
+        states = {
+            type(callback).__name__: {
+                field: float(getattr(callback, field)) if field == 'best' else int(getattr(callback, field))
+                for field in self.FIELDS if getattr(callback, field, None) is not None
+            }
+            for callback in self.callbacks
+        }
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(states, f)
+
+
+def resolve_run_dir(config, config_name):
+    """
+    決定這次訓練的資料夾：<model_save_dir>/<config>_<architecture>/<timestamp>/
+
+    最新一次 run 留有斷點 (backup/) 時接續該次訓練，否則建立新的 run 資料夾。
+
+    Returns:
+        (run_dir, resumed)
+    """
+    base_dir = os.path.join(config['model_save_dir'], f"{config_name}_{config['architecture']}")
+    runs = sorted(glob.glob(os.path.join(base_dir, '*', '')))
+    if runs and os.path.isdir(os.path.join(runs[-1], 'backup')):
+        return os.path.normpath(runs[-1]), True
+    run_dir = os.path.join(base_dir, time.strftime('%Y%m%d_%H%M%S'))
+    os.makedirs(run_dir, exist_ok=True)
+    return run_dir, False
+
+
+def build_callbacks(config, run_dir, class_names, source, resumed=False):
+    """依配置建立提前停止、降低學習率、斷點與最佳模型保留的 callbacks (最後一個為 BestModelsKeeper)"""
+    early_stopping = tf.keras.callbacks.EarlyStopping(
+        monitor='val_accuracy',
+        patience=config['early_stopping_patience'],
+        restore_best_weights=True
+    )
+    reduce_lr = tf.keras.callbacks.ReduceLROnPlateau(
+        monitor='val_loss',
+        factor=config['reduce_lr_factor'],
+        patience=config['reduce_lr_patience']
+    )
+    return [
+        early_stopping,
+        reduce_lr,
+        CallbackStateStore(
+            os.path.join(run_dir, 'callback_state.json'),
+            [early_stopping, reduce_lr],
+            resume=resumed
+        ),
+        # 斷點包含模型權重、優化器狀態與目前的 epoch，訓練正常結束後會自動刪除
+        tf.keras.callbacks.BackupAndRestore(
+            backup_dir=os.path.join(run_dir, 'backup'),
+            save_freq=config['checkpoint_freq']
+        ),
+        BestModelsKeeper(
+            os.path.join(run_dir, 'best'),
+            config['keep_best_n'],
+            config['architecture'],
+            class_names,
+            source,
+            resume=resumed
+        ),
+    ]
+
+
+def teacher_soft_targets(teacher_path, images, class_names, temperature, batch_size):
+    """
+    以 teacher 模型產生經溫度軟化的機率分佈
+
+    teacher 的輸出已是 softmax，log(p) 與原始 logits 只差一個常數，
+    因此 softmax(log(p) / T) 即為溫度 T 下的軟標籤。
+    """
+    teacher = tf.keras.models.load_model(teacher_path, compile=False)
+    if teacher.output_shape[-1] != len(class_names):
+        raise ValueError(f"Teacher 輸出 {teacher.output_shape[-1]} 類，但資料集有 {len(class_names)} 類")
+    teacher_classes = load_label_classes(teacher_path)
+    if teacher_classes is not None and teacher_classes != class_names:
+        raise ValueError(f"Teacher 的標籤清單 {manifest_path_for(teacher_path)} 與資料集的類別順序不一致")
+
+    probs = teacher.predict(images, batch_size=batch_size, verbose=0)
+    log_probs = np.log(np.clip(probs, 1e-7, 1.0)) / temperature
+    log_probs -= log_probs.max(axis=1, keepdims=True)
+    soft = np.exp(log_probs)
+    return (soft / soft.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def distillation_targets(labels, soft_targets, num_classes):
+    """將 one-hot 硬標籤與軟標籤串接成 (N, 2 * num_classes)，供蒸餾損失拆開使用"""
+    hard = np.eye(num_classes, dtype=np.float32)[labels]
+    return np.concatenate([hard, soft_targets], axis=1)
+
+
+def distillation_loss(num_classes, temperature, alpha):
+    """硬標籤交叉熵與 teacher / student 軟分佈 KL 散度的加權和"""
+    def loss(y_true, y_pred):
+        hard, soft = y_true[:, :num_classes], y_true[:, num_classes:]
+        y_pred = tf.cast(y_pred, tf.float32)
+        hard_loss = tf.keras.losses.categorical_crossentropy(hard, y_pred)
+        student_soft = tf.nn.softmax(tf.math.log(tf.clip_by_value(y_pred, 1e-7, 1.0)) / temperature)
+        kl = tf.reduce_sum(
+            soft * (tf.math.log(tf.clip_by_value(soft, 1e-7, 1.0)) - tf.math.log(tf.clip_by_value(student_soft, 1e-7, 1.0))),
+            axis=-1
+        )
+        # 乘上 T^2 讓蒸餾損失的梯度大小不隨溫度改變
+        return alpha * hard_loss + (1 - alpha) * temperature ** 2 * kl
+    return loss
+
+
+def distillation_accuracy(num_classes):
+    """只依硬標籤計算準確率 (名稱維持 accuracy，讓 val_accuracy 的監控不變)"""
+    def accuracy(y_true, y_pred):
+        return tf.cast(tf.equal(tf.argmax(y_true[:, :num_classes], axis=-1), tf.argmax(y_pred, axis=-1)), tf.float32)
+    return accuracy
+
+
+def save_model(model, model_path, architecture, class_names, source):
+    """
+    以 float32 儲存模型並在旁邊寫出標籤清單
+
+    以 mixed_bfloat16 訓練時各層會保存 bfloat16 的運算 policy，載入後仍以 bfloat16 推論，
+    因此先在 float32 policy 下重建相同架構並複製權重 (權重本身即為 float32) 再儲存。
+    """
+    policy = tf.keras.mixed_precision.global_policy().name
+    export = model
+    if policy != 'float32':
+        tf.keras.mixed_precision.set_global_policy('float32')
+        try:
+            export = get_model(model.input_shape[1:], model.output_shape[-1], architecture)
+            export.set_weights(model.get_weights())
+        finally:
+            tf.keras.mixed_precision.set_global_policy(policy)
+    export.save(model_path)
+    return write_label_manifest(model_path, class_names, source=source,
+                                precision_policy='float32', training_precision_policy=policy)
+
+
+def record_benchmark(config, record):
+    """將此次訓練的效能紀錄附加到 benchmarks.jsonl"""
+    path = os.path.join(config['model_save_dir'], BENCHMARK_FILE)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return path
+
+
+def select_fastest_config(save_dir, min_accuracy):
+    """從效能紀錄中找出達到準確率門檻、吞吐量最高的配置"""
+    path = os.path.join(save_dir, BENCHMARK_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"找不到效能紀錄 {path}")
+    with open(path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    print(f"{'config':16s} {'architecture':14s} {'precision':15s} {'xla':5s} {'batch':>6s} {'img/s':>9s} "
+          f"{'s/epoch':>8s} {'params':>10s} {'MFLOPs':>8s} {'CPU ms':>7s} {'val_acc':>8s}")
+    for r in records:
+        print(f"{r['config']:16s} {r.get('architecture', 'advanced_cnn'):14s} {r['precision_policy']:15s} "
+              f"{str(r['xla']):5s} {r['batch_size']:6d} {r['images_per_sec']:9.0f} {np.mean(r['epoch_times']):8.1f} "
+              f"{r.get('params', 0):10d} {r.get('flops', 0) / 1e6:8.1f} {r.get('cpu_latency_ms', 0.0):7.2f} "
+              f"{r['best_val_accuracy']:8.4f}")
+
+    qualified = [r for r in records if r['best_val_accuracy'] >= min_accuracy]
+    if not qualified:
+        return None
+    return max(qualified, key=lambda r: r['images_per_sec'])
+
+
+def train(config_name, overrides=None):
+    """依指定配置訓練模型並記錄效能"""
+    config = {**get_config(config_name), **(overrides or {})}
+    runtime = configure_runtime(config)
+    # 每次訓練的斷點與最佳模型放在各自的 run 資料夾，中斷後重新執行會接續最新一次
+    run_dir, resumed = resolve_run_dir(config, config_name)
+    if resumed:
+        print(f"找到 {run_dir} 中的斷點，將從上次中斷處繼續訓練")
+
+    np.random.seed(config['random_state'])
+    tf.random.set_seed(config['random_state'])
+
+    images, labels, class_names = load_dataset(config)
+    source = config['packed_dir'] if has_packed_dataset(config) else config['converted_dir']
+    X_train, X_val, y_train, y_val = split_dataset(images, labels, config)
+    print(f"訓練集: {len(X_train)} 張, 驗證集: {len(X_val)} 張")
+
+    num_classes = len(class_names)
+    loss = 'sparse_categorical_crossentropy'
+    metrics = ['accuracy']
+    if config['teacher_model']:
+        temperature = config['distill_temperature']
+        print(f"以 {config['teacher_model']} 作為 teacher 進行知識蒸餾 (T={temperature})")
+        y_train = distillation_targets(y_train, teacher_soft_targets(
+            config['teacher_model'], X_train, class_names, temperature, config['batch_size']), num_classes)
+        y_val = distillation_targets(y_val, teacher_soft_targets(
+            config['teacher_model'], X_val, class_names, temperature, config['batch_size']), num_classes)
+        loss = distillation_loss(num_classes, temperature, config['distill_alpha'])
+        metrics = [distillation_accuracy(num_classes)]
+
+    height, width = config['image_size']
+    model = get_model((height, width, 1), num_classes, config['architecture'])
+    learning_rate = scaled_learning_rate(config)
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+        loss=loss,
+        metrics=metrics,
+        jit_compile=runtime['xla']
+    )
+    print(f"模型架構: {config['architecture']}, 執行環境: {runtime}, 學習率: {learning_rate}")
+
+    throughput = ThroughputLogger(len(X_train))
+    callbacks = build_callbacks(config, run_dir, class_names, source, resumed)
+    keeper = callbacks[-1]
+    history = model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        epochs=config['epochs'],
+        batch_size=config['batch_size'],
+        callbacks=[throughput, *callbacks]
+    )
+    # 接續訓練時 history 與 EarlyStopping 還原的權重只涵蓋這次執行的 epoch，
+    # 因此改用 keeper 保留的整體最佳模型，讓儲存的模型與記錄的準確率一致
+    best_val_accuracy = max(history.history['val_accuracy'])
+    if resumed and keeper.best:
+        best_val_accuracy, best_path = keeper.best[0]
+        print(f"接續訓練：以整體最佳模型 {os.path.basename(best_path)} 作為最終模型")
+        model = tf.keras.models.load_model(best_path, compile=False)
+
+    timestamp = time.strftime('%Y%m%d_%H%M%S')
+    model_path = os.path.join(config['model_save_dir'], f'quickdraw_{config_name}_{timestamp}.keras')
+    save_model(model, model_path, config['architecture'], class_names, source)
+
+    record = {
+        'config': config_name,
+        'architecture': config['architecture'],
+        'teacher_model': config['teacher_model'],
+        'timestamp': timestamp,
+        'model_path': model_path,
+        'run_dir': run_dir,
+        'resumed': resumed,
+        **runtime,
+        **profile_model(model),
+        'batch_size': config['batch_size'],
+        'learning_rate': learning_rate,
+        'num_train_samples': len(X_train),
+        'epoch_times': throughput.epoch_times,
+        'images_per_sec': throughput.steady_images_per_sec(),
+        'best_val_accuracy': float(best_val_accuracy),
+    }
+    record_benchmark(config, record)
+    print(f"\n✓ 模型已儲存: {model_path}")
+    print(f"吞吐量: {record['images_per_sec']:.0f} images/sec, 最佳驗證準確率: {record['best_val_accuracy']:.4f}")
+    print(f"參數: {record['params']:,}, FLOPs: {record['flops']:,}, CPU 延遲: {record['cpu_latency_ms']:.2f} ms")
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quick Draw 模型訓練')
+    parser.add_argument('--config', default='quick_test', choices=list(CONFIGS.keys()), help='訓練配置名稱')
+    parser.add_argument('--select', type=float, metavar='MIN_ACCURACY',
+                        help='不訓練，只從效能紀錄中選出達到準確率門檻的最快配置')
+    parser.add_argument('--architecture', choices=list(MODEL_BUILDERS.keys()), help='覆寫配置中的模型架構')
+    parser.add_argument('--teacher', metavar='MODEL_PATH', help='以此模型作為 teacher 進行知識蒸餾')
+    args = parser.parse_args()
+
+    if args.select is not None:
+        best = select_fastest_config(get_config(args.config)['model_save_dir'], args.select)
+        if best:
+            print(f"\n最快且準確率 >= {args.select:.2%} 的配置: {best['config']} "
+                  f"({best['images_per_sec']:.0f} images/sec, val_acc {best['best_val_accuracy']:.4f})")
+        else:
+            print(f"\n沒有配置達到準確率 {args.select:.2%}")
+        return
+
+    overrides = {}
+    if args.architecture:
+        overrides['architecture'] = args.architecture
+    if args.teacher:
+        overrides['teacher_model'] = args.teacher
+    train(args.config, overrides)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
+import math
+import os
+import time
+
 import torch
 from transformers import (
     AutoModelForCausalLM,
@@ -5,6 +9,8 @@ from transformers import (
 )
 from peft import PeftModel
 
+from cache import ResponseCache
+
 def load_model(base_model_name: str, lora_weights_path: str):
     """
     Load the 4-bit quantized base LLaMA model and merge LoRA weights for inference.
@@ -44,13 +50,13 @@ def generate(
     temperature: float = 0.7,
     top_p: float = 0.9,
     repetition_penalty: float = 2.0,
+    num_variants: int = 1,
 ):
     """
-    Generate text from the prompt.
+    Sample num_variants completions for the prompt in one generate call.
+    Returns a list with only the newly generated text of each sequence.
     """
-    # Tokenize
     inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
-    # Generate
     outputs = model.generate(
         **inputs,
         max_new_tokens=max_new_tokens,
@@ -58,16 +64,54 @@ def generate(
         top_p=top_p,
         repetition_penalty=repetition_penalty,
         do_sample=True,
+        num_return_sequences=num_variants,
         pad_token_id=tokenizer.eos_token_id,
     )
-    # Decode and return
-    return tokenizer.decode(outputs[0], skip_special_tokens=True)
+    prompt_length = inputs["input_ids"].shape[1]
+    return tokenizer.batch_decode(outputs[:, prompt_length:], skip_special_tokens=True)
 
 BASE_MODEL = "unsloth/Llama-3.2-1B"
 LORA_WEIGHTS = "finetuned"  # path where you saved LoRA-tuned model
 model = load_model(BASE_MODEL, LORA_WEIGHTS)
 tokenizer = load_tokenizer(BASE_MODEL)
 
+# Generation parameters a request may override; they are part of the cache key
+GENERATION_PARAMS = {
+    "max_new_tokens": 16,
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "repetition_penalty": 2.0,
+}
+# Client-supplied values are clamped into these ranges
+GENERATION_PARAM_RANGES = {
+    "max_new_tokens": (1, 64),
+    "temperature": (0.1, 1.5),
+    "top_p": (0.1, 1.0),
+    "repetition_penalty": (1.0, 3.0),
+}
+
+def parse_generation_params(data: dict):
+    """
+    Read generation parameters from the request, falling back to the defaults
+    and clamping each value into its allowed range.
+    """
+    params = {}
+    for name, default in GENERATION_PARAMS.items():
+        value = type(default)(data.get(name, default))
+        if not math.isfinite(value):
+            raise ValueError(f"{name} must be finite")
+        low, high = GENERATION_PARAM_RANGES[name]
+        params[name] = min(max(value, low), high)
+    return params
+
+# Cache of replies to repeated chat lines; set LLM_CACHE_VARIANTS > 1 to sample
+# several variants per prompt so repeated prompts still get varied replies
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("LLM_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.environ.get("LLM_CACHE_TTL", "600")),
+    variants=int(os.environ.get("LLM_CACHE_VARIANTS", "1")),
+)
+
 from flask import Flask, request, jsonify
 app = Flask(__name__)
 
@@ -79,15 +123,33 @@ def generate_text():
 
     prompt = data['prompt']
     try:
-        generated_text = generate(
-            model,
-            tokenizer,
-            prompt,
-        )
-        return jsonify({'generated_text': generated_text})
+        params = parse_generation_params(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid generation parameter: {e}'}), 400
+
+    key = ResponseCache.make_key(prompt, params)
+    completion = response_cache.get(key)
+    cached = completion is not None
+    try:
+        if not cached:
+            start = time.perf_counter()
+            completions = generate(
+                model,
+                tokenizer,
+                prompt,
+                num_variants=response_cache.variants,
+                **params,
+            )
+            response_cache.put(key, completions, time.perf_counter() - start)
+            completion = completions[0]
+        return jsonify({'generated_text': prompt + completion, 'cached': cached})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify({'response_cache': response_cache.metrics()})
+
 if __name__ == '__main__':
     # For development, run with debug=True
     # For production, use Gunicorn or uWSGI
@@ -0,0 +1,85 @@
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a chat line for cache lookup: case-fold, trim, collapse whitespace
+    and repeated punctuation, so "Hi!!!" and "hi !" share a key.
+    """
+    text = re.sub(r"\s+", " ", prompt.strip().casefold())
+    text = re.sub(r"\s*([!?.~,])\1*", r"\1", text)
+    return text
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of generated completions keyed by normalized prompt and
+    generation parameters. Each entry holds a pool of pre-sampled variants
+    (one by default) so repeated prompts can still get varied replies.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600.0, variants: int = 1):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.variants = max(1, variants)
+        self._entries = OrderedDict()  # key -> (completions, created_at, seconds_per_completion)
+        self._lock = threading.Lock()
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evicted": 0,
+            "generation_seconds": 0.0,
+            "generation_seconds_saved": 0.0,
+        }
+
+    @staticmethod
+    def make_key(prompt: str, params: dict):
+        return normalize_prompt(prompt), tuple(sorted(params.items()))
+
+    def get(self, key):
+        """
+        Return a random cached completion for the key, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                self._metrics["expired"] += 1
+                entry = None
+            if entry is None:
+                self._metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._metrics["hits"] += 1
+            self._metrics["generation_seconds_saved"] += entry[2]
+            return random.choice(entry[0])
+
+    def put(self, key, completions, generation_seconds: float):
+        """
+        Store the sampled completions for the key. generation_seconds is the time
+        the generate call took; its per-completion share is credited as saved on
+        every later hit, since a hit replaces sampling a single completion.
+        """
+        completions = list(completions)
+        with self._lock:
+            self._metrics["generation_seconds"] += generation_seconds
+            per_completion = generation_seconds / max(1, len(completions))
+            self._entries[key] = (completions, time.monotonic(), per_completion)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._metrics["evicted"] += 1
+
+    def metrics(self):
+        with self._lock:
+            lookups = self._metrics["hits"] + self._metrics["misses"]
+            return {
+                **self._metrics,
+                "entries": len(self._entries),
+                "hit_rate": self._metrics["hits"] / lookups if lookups else 0.0,
+            }
@@ -1,10 +1,15 @@
 import os
+import sys
 import numpy as np
 from PIL import Image
 import tensorflow as tf
 from tqdm import tqdm # 引入 tqdm
 import random # 引入 random 模組用於隨機抽樣
 
+# 標籤清單的格式與檔名規則定義在 leo_model_package/labels.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'leo_model_package'))
+from labels import manifest_path_for, load_label_classes
+
 # 設定模型路徑和測試圖片資料夾路徑
 model_path = "quickdraw_model.keras"
 converted_data_dir = "converted_image" # 處理好的圖片資料來源
@@ -21,9 +26,17 @@ except Exception as e:
 
 # 重新建立類別名稱列表 (與 tmp.py 中載入資料時的順序一致)
 try:
-    classes = sorted([d for d in os.listdir(converted_data_dir) if os.path.isdir(os.path.join(converted_data_dir, d))])
+    # 優先使用與模型一起儲存的標籤清單，確保類別順序與訓練時一致
+    classes = load_label_classes(model_path)
+    if classes is not None:
+        print(f"從標籤清單 '{manifest_path_for(model_path)}' 載入類別")
+    else:
+        classes = sorted([d for d in os.listdir(converted_data_dir) if os.path.isdir(os.path.join(converted_data_dir, d))])
+        print(f"從 '{converted_data_dir}' 掃描類別")
     num_classes = len(classes)
-    print(f"從 '{converted_data_dir}' 掃描到 {num_classes} 個類別")
+    if model.output_shape[-1] != num_classes:
+        raise ValueError(f"模型輸出 {model.output_shape[-1]} 類，但類別清單有 {num_classes} 類")
+    print(f"共 {num_classes} 個類別")
     # 建立類別索引到名稱的對應，方便後續查找
     idx_to_class = {i: class_name for i, class_name in enumerate(classes)}
     # 建立類別名稱到索引的對應，方便後續查找正確標籤的索引
@@ -42,6 +55,8 @@ print(f"\n--- 開始測試所有圖片 (每類最多 {max_test_samples_per_class
 # 移除硬編碼的類別名稱，改為遍歷所有類別
 for class_name in tqdm(classes, desc="測試進度"):
     class_dir_path = os.path.join(converted_data_dir, class_name)
+    if not os.path.isdir(class_dir_path):
+        continue
     # 獲取正確的類別索引
     correct_class_idx = class_to_idx[class_name]
 
@@ -1,10 +1,15 @@
 import os
+import sys
 # json is not needed for loading pre-processed images
 import random
 import numpy as np
 from PIL import Image # ImageDraw is not needed
 from tqdm import tqdm
 
+# 標籤清單的格式與檔名規則定義在 leo_model_package/labels.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'leo_model_package'))
+from labels import write_label_manifest
+
 # 設定參數
 converted_data_dir = "converted_image" # 處理好的圖片資料來源
 image_size = 28 # 假設處理好的圖片尺寸是 28x28
@@ -136,3 +141,7 @@ model.compile(optimizer='adam',
 # 使用按區塊打亂後的資料進行訓練，validation_split 會從中分割
 model.fit(shuffled_images, shuffled_labels, epochs=10, validation_split=0.2)
 model.save("quickdraw_model.keras")
+
+# 將類別順序寫成標籤清單，與模型放在一起 (ai-server 載入模型時會一併讀取)
+write_label_manifest("quickdraw_model.keras", classes, source=converted_data_dir)
+print("✅ 已儲存模型與標籤清單")
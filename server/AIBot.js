@@ -1,18 +1,19 @@
-const axios = require('axios');
 // For TypeScript:
-// import axios, { AxiosInstance } from 'axios';
+// import AIClient from './aiClient';
 // import { Server as SocketIOServer } from 'socket.io';
 
 class AIBot {
-    constructor(botId, roomId, user, flaskApiUrl, io) {
+    constructor(botId, roomId, user, aiClient, io, difficulty = 'hard') {
         this.botId = botId; // used as userId
         this.roomId = roomId;
-        this.flaskApiUrl = flaskApiUrl;
+        this.aiClient = aiClient; // Shared keep-alive connection pool to the Flask server
+        this.difficulty = difficulty; // Difficulty profile understood by the Flask server ('easy', 'normal', 'hard')
         this.io = io; // Socket.IO server instance to emit guesses
         this.isPredicting = false; // Flag to prevent concurrent Flask requests
         this.lastPredictedClass = null; // To avoid repeating the same guess
         this.lastReceivedDataUrl = null; // Store the most recent dataUrl
         this.predictionRequestQueue = []; // For throttling/batching (advanced)
+        this.predictionDeadlineMs = 1200; // Budget from send; the server drops the frame instead of scoring it once it is spent
 
         // Bot state: A bot might only guess if the game is in a drawing phase
         this.isActiveInGame = false; // Controlled by `startGuessing` / `stopGuessing`
@@ -40,6 +41,20 @@ class AIBot {
         // this.predictionInterval = setInterval(() => this.makePrediction(), 1000); // Not strictly needed here given WebSocket trigger
     }
 
+    // Called at the start of every round: the Flask server keeps this room's candidate labels
+    // and the labels already guessed, so it never suggests the same wrong guess twice.
+    async startRound(word) {
+        this.lastPredictedClass = null;
+        try {
+            await this.aiClient.startRound(this.roomId, {
+                difficulty: this.difficulty,
+                target: word
+            });
+        } catch (error) {
+            console.error(`Bot ${this.botId} failed to start round on Flask server (Room ${this.roomId}):`, error.message);
+        }
+    }
+
     stopGuessing() {
         this.isActiveInGame = false;
         this.isPredicting = false; // Ensure any pending requests are conceptually cancelled
@@ -54,25 +69,26 @@ class AIBot {
         }
 
         this.isPredicting = true;
+        const dataUrl = this.lastReceivedDataUrl;
         let predictionResult = { success: false, predicted_class: '...', probabilities: {} }; // Default placeholder
 
         try {
-            console.log("flaskApiUrl", this.flaskApiUrl);
-            const response = await axios.post(this.flaskApiUrl, {
-                dataUrl: this.lastReceivedDataUrl
-            }, {
-                timeout: 1500 // Timeout for Flask response, ensuring it's within 2s total
+            // Sent as a binary frame over the pooled connection; the server scores only
+            // this round's candidates, minus labels already guessed in this room
+            const data = await this.aiClient.predict(this.roomId, dataUrl, {
+                deadlineMs: this.predictionDeadlineMs
             });
 
-            if (response.data.success) {
-                predictionResult = response.data;
-                const { predicted_class, probabilities } = predictionResult;
-
-                // probabilities is a dictionary: { class1: prob1, class2: prob2, ... }
-                const confidence = Math.max(...Object.values(probabilities));
+            if (data.status === 'superseded' || data.status === 'expired' || data.status === 'late') {
+                // The server skipped this frame (a newer one from this room replaced it, or it went stale),
+                // or finished it after the deadline; late guesses are not recorded for the room, so drop them too
+                console.log(`Bot ${this.botId} in Room ${this.roomId}: frame ${data.status}, no guess.`);
+            } else if (data.success) {
+                predictionResult = data;
+                const { predicted_class, confidence } = predictionResult;
 
-                // Decision logic: Only announce if guess changes or confidence is high enough
-                if (predicted_class !== this.lastPredictedClass) { // Example threshold
+                // Decision logic: Only announce if guess changes; the server already excludes labels guessed this round
+                if (predicted_class && predicted_class !== this.lastPredictedClass) {
                     this.lastPredictedClass = predicted_class;
                     // Emit the guess to all clients in the room via WebSocket
                     this.io.to(this.roomId).emit('aiGuess', {
@@ -95,15 +111,12 @@ class AIBot {
                     //     content: predicted_class,
                     //     isGuess: true,
                     // })
-                } else {
-                    // Guess a random class if the prediction is the same as the last one
-                    console.log("Guessing a random class due to repeated prediction:", predicted_class);
-                    const randomClass = Object.keys(probabilities)[Math.floor(Math.random() * Object.keys(probabilities).length)];
-                    this.lastPredictedClass = randomClass;
+                } else if (!predicted_class) {
+                    console.log(`Bot ${this.botId} in Room ${this.roomId} has no candidates left to guess.`);
                 }
             } else {
-                console.error(`Flask prediction error for bot ${this.botId}:`, response.data.error);
-                predictionResult.error = response.data.error;
+                console.error(`Flask prediction error for bot ${this.botId}:`, data.error);
+                predictionResult.error = data.error;
             }
 
         } catch (error) {
@@ -111,7 +124,11 @@ class AIBot {
             predictionResult.error = error.message;
         } finally {
             this.isPredicting = false;
-            this.lastReceivedDataUrl = null; // Clear data after prediction
+            if (this.lastReceivedDataUrl === dataUrl) {
+                this.lastReceivedDataUrl = null; // Clear data after prediction
+            } else {
+                this.makePrediction(); // A newer frame arrived while predicting; score it instead of dropping it
+            }
         }
     }
 }
@@ -1,6 +1,7 @@
 // AIBotManager.js (or AIBotManager.ts)
 const axios = require('axios'); // Use axios for HTTP requests (better than node-fetch for server-side)
 const AIBot = require('./AIBot'); // Import the AIBot class
+const AIClient = require('./aiClient'); // Pooled binary channel to the Flask server
 const roomManager = require('./roomManager'); // Import roomManager to access global player states
 // const { User } = require('../types')
 // For TypeScript:
@@ -13,7 +14,9 @@ class AIBotManager {
             return AIBotManager.instance; // Singleton Pattern
         }
         this.rooms = {}; // Structure: { roomId: { bots: { botId: AIBotInstance }, sockets: Set<Socket> } }
-        this.flaskApiUrl = 'http://127.0.0.1:5000/predict'; // Your Flask server URL
+        this.flaskApiUrl = 'http://127.0.0.1:5000'; // Your Flask server URL
+        this.aiClient = new AIClient(this.flaskApiUrl, { timeout: 1500, responseGraceMs: 300 }); // Shared by all bots; deadline + grace keeps each guess within 2s total
+        this.botDifficulty = 'hard'; // 'easy' | 'normal' | 'hard' (full label space)
         this.llmApiUrl = 'http://127.0.0.1:5001/generate'; // Your LLM server URL (if needed)
         this.io = null; // Will be set after manager is instantiated in server.js
         this.canvasUpdateCooldowns = {}; // { roomId: timestamp_of_last_prediction_request }
@@ -88,7 +91,7 @@ class AIBotManager {
             this.userSocketMap[botId] = null; // AI bots don't have a socket connection, but we keep the map consistent
             console.log("[aiBotManagers] allPlayers", this.allPlayers);
 
-            this.rooms[roomId].bots[botId] = new AIBot(botId, roomId, aiPlayer, this.flaskApiUrl, this.io);
+            this.rooms[roomId].bots[botId] = new AIBot(botId, roomId, aiPlayer, this.aiClient, this.io, this.botDifficulty);
 
             roomManager.addPlayerToRoom(roomId, aiPlayer); // Add AI player to room in roomManager
             console.log(`[addBotToRoom] Bot ${botId} added to room ${roomId}.`);
@@ -117,6 +120,8 @@ class AIBotManager {
                 this.removeBotFromRoom(roomId, botId);
             }
             this.rooms[roomId].bots = {}; // Clear the bots object
+            this.aiClient.removeRoom(roomId)
+                .catch(error => console.error(`Failed to clear Flask room state for ${roomId}:`, error.message));
             console.log(`All bots removed from room ${roomId}.`);
         } else {
             console.log(`No bots found in room ${roomId}.`);
@@ -143,6 +148,14 @@ class AIBotManager {
         }
     }
 
+    startRoundInRoom(roomId, word) {
+        if (this.rooms[roomId]) {
+            for (const botId in this.rooms[roomId].bots) {
+                this.rooms[roomId].bots[botId].startRound(word); // Reset candidates and guessed labels for the new round
+            }
+        }
+    }
+
     stopAllBotsInRoom(roomId) {
         console.log(`Stopping all bots in room ${roomId}.`);
         if (this.rooms[roomId]) {
@@ -0,0 +1,64 @@
+// aiClient.js
+const http = require('http');
+const axios = require('axios');
+
+// Binary frame understood by the Flask server's /predict:
+// [4-byte big-endian header length][UTF-8 JSON header][PNG bytes]
+const FRAME_MIMETYPE = 'application/x-quickdraw-frame';
+
+class AIClient {
+    constructor(baseUrl, { timeout = 1500, responseGraceMs = 300 } = {}) {
+        // Keep-alive pool: connections are reused across predictions from every room,
+        // so the hot path no longer pays a TCP handshake per request.
+        // No socket cap: each bot has at most one request outstanding, so every room's frame
+        // reaches the server's scheduler instead of waiting in a FIFO queue here.
+        this.agent = new http.Agent({ keepAlive: true });
+        this.http = axios.create({ baseURL: baseUrl, httpAgent: this.agent, timeout });
+        this.responseGraceMs = responseGraceMs; // Extra time for the response to arrive after the deadline
+        this.nextRequestId = 1;
+    }
+
+    static decodeDataUrl(dataUrl) {
+        const comma = dataUrl.indexOf(',');
+        return Buffer.from(comma >= 0 ? dataUrl.slice(comma + 1) : dataUrl, 'base64');
+    }
+
+    static encodeFrame(header, image) {
+        const headerBuffer = Buffer.from(JSON.stringify(header), 'utf-8');
+        const lengthBuffer = Buffer.alloc(4);
+        lengthBuffer.writeUInt32BE(headerBuffer.length, 0);
+        return Buffer.concat([lengthBuffer, headerBuffer, image]);
+    }
+
+    // options.deadlineMs is a budget from now; it is sent as an absolute deadlineAt (epoch ms,
+    // both processes share the clock) so time spent queued or in transit counts against it,
+    // and the request timeout is kept strictly longer so an on-time result is never dropped here.
+    async predict(roomId, dataUrl, { deadlineMs, ...options } = {}) {
+        const requestId = `${process.pid}-${this.nextRequestId++}`;
+        const header = { requestId, roomId, ...options };
+        const config = { headers: { 'Content-Type': FRAME_MIMETYPE } };
+        if (deadlineMs !== undefined) {
+            header.deadlineAt = Date.now() + deadlineMs;
+            config.timeout = deadlineMs + this.responseGraceMs;
+        }
+        const frame = AIClient.encodeFrame(header, AIClient.decodeDataUrl(dataUrl));
+
+        const response = await this.http.post('/predict', frame, config);
+        if (response.data.requestId !== requestId) {
+            throw new Error(`Mismatched response ${response.data.requestId} for request ${requestId}`);
+        }
+        return response.data;
+    }
+
+    async startRound(roomId, body) {
+        const response = await this.http.post(`/rooms/${encodeURIComponent(roomId)}/round`, body);
+        return response.data;
+    }
+
+    async removeRoom(roomId) {
+        const response = await this.http.delete(`/rooms/${encodeURIComponent(roomId)}`);
+        return response.data;
+    }
+}
+
+module.exports = AIClient;
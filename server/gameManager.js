@@ -251,6 +251,7 @@ module.exports = {
     delete gameState.correctAnswer;
 
     io.to(roomId).emit('gameState', gameState);
+    botManager.startRoundInRoom(roomId, word); // Bots only score this round's candidates
     if (userSocketMap[nextDrawerId]) {
       io.to(userSocketMap[nextDrawerId]).emit('isDrawingTurn', true);
     }